@@ -0,0 +1,91 @@
+# ==========================================================
+# bench_composite_index.py
+# Benchmark composite_index vs composite_index_fused
+# Jalankan: python -m benchmarks.bench_composite_index
+# ==========================================================
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from engine.indices import (
+    classify_risk,
+    classify_risk_code,
+    composite_index,
+    composite_index_fused,
+)
+from benchmarks.common import measure
+
+
+# ==========================================================
+# 1️⃣ DATA UJI
+# ==========================================================
+def make_grid(size=2000, steps=6, seed=0):
+    """
+    Grid BT/RCR acak (time, lat, lon)
+    """
+    rng = np.random.default_rng(seed)
+    shape = (steps, size, size)
+
+    ds = xr.Dataset(
+        {
+            "BT_IR": (("time", "lat", "lon"), 290 - 80 * rng.random(shape)),
+            "RCR": (("time", "lat", "lon"), 8 * rng.random(shape) - 3),
+        },
+        coords={
+            "time": pd.date_range("2026-01-01 00:00", periods=steps, freq="10min"),
+            "lat": np.linspace(-8.5, -7.0, size),
+            "lon": np.linspace(112.0, 113.5, size),
+        },
+    )
+    return ds
+
+
+# ==========================================================
+# 2️⃣ VARIAN YANG DIBANDINGKAN
+# ==========================================================
+def run_original(ds):
+    ci = composite_index(ds)
+    risk = classify_risk(ci)
+    return ci, risk
+
+
+def run_fused(ds):
+    return composite_index_fused(ds, with_risk=True)
+
+
+# ==========================================================
+# MAIN
+# ==========================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark composite_index")
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    ds = make_grid(args.size, args.steps)
+    print(f"🧪 Grid {args.steps}×{args.size}×{args.size}")
+
+    (ci_ref, risk_ref), m_ref = measure(run_original, ds)
+    (ci_new, risk_new), m_new = measure(run_fused, ds)
+
+    # paritas
+    assert np.allclose(ci_ref.values, ci_new.values, atol=1e-6)
+    assert (classify_risk_code(ci_ref).values == risk_new.values).all()
+
+    results = {
+        "grid": [args.steps, args.size, args.size],
+        "original": m_ref,
+        "fused": m_new,
+    }
+
+    print(f"composite_index + classify_risk : {m_ref['seconds']:8.2f} s | puncak {m_ref['peak_mb']:9.1f} MB")
+    print(f"composite_index_fused           : {m_new['seconds']:8.2f} s | puncak {m_new['peak_mb']:9.1f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,116 @@
+# ==========================================================
+# bench_dtype.py
+# Benchmark memori: float64/string vs kebijakan float32/uint8/int16
+# Jalankan: python -m benchmarks.bench_dtype --sizes 500 2000
+# ==========================================================
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from engine.dtypes import FIELD_DTYPE, disk_encoding
+from engine.reader import read_sample_data
+from engine.preprocessor import preprocess_all
+from engine.indices import calculate_indices, classify_risk, classify_risk_code
+from engine.detector import run_detector_grid
+from benchmarks.common import measure
+
+
+# ==========================================================
+# 1️⃣ PIPELINE UJI
+# ==========================================================
+def pipeline(ds, with_preprocess=False):
+    """
+    (preprocess) → indices → level grid → risiko, seperti siklus service
+    """
+    if with_preprocess:
+        ds = preprocess_all({"satellite": ds})["satellite"]
+    out = calculate_indices(ds)
+    out["cape"] = out["BT_IR"] * 0 + 1500
+    out["shear"] = out["RCR"] * 0 + 10
+    level = run_detector_grid(out, var_map={"cb_index": "CI"})
+    return out, level
+
+
+def file_size(ds, encoding=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "out.nc"
+        ds.to_netcdf(path, encoding=encoding)
+        return path.stat().st_size
+
+
+# ==========================================================
+# 2️⃣ SKENARIO
+# ==========================================================
+def run_scenario(size, steps=6, with_preprocess=False):
+    ds32 = read_sample_data(size, size, steps, seed=0)
+    ds64 = ds32.astype(np.float64)
+    assert ds32["BT_IR"].dtype == FIELD_DTYPE
+
+    result = {"grid": [steps, size, size]}
+
+    for label, ds in (("float64", ds64), ("float32", ds32)):
+        (out, level), m = measure(pipeline, ds, with_preprocess)
+        result[label] = {
+            "input_mb": ds.nbytes / 1e6,
+            "indices_mb": out[["BT_IR", "RCR", "CI"]].nbytes / 1e6,
+            "pipeline_seconds": m["seconds"],
+            "pipeline_peak_mb": m["peak_mb"],
+        }
+
+    ci = out["CI"]
+    risk_str, m_str = measure(classify_risk, ci)
+    risk_code, m_code = measure(classify_risk_code, ci)
+    result["risk_grid"] = {
+        "string_mb": risk_str.nbytes / 1e6,
+        "string_peak_mb": m_str["peak_mb"],
+        "uint8_mb": risk_code.nbytes / 1e6,
+        "uint8_peak_mb": m_code["peak_mb"],
+        "level_uint8_mb": level.nbytes / 1e6,
+    }
+
+    disk_ds = out[["BT_IR", "RCR", "CI"]]
+    disk_ds["level"] = level
+    result["disk"] = {
+        "float64_mb": file_size(disk_ds.astype(np.float64)) / 1e6,
+        "int16_zlib_mb": file_size(disk_ds, disk_encoding(disk_ds)) / 1e6,
+    }
+
+    return result
+
+
+def print_result(r):
+    f64, f32 = r["float64"], r["float32"]
+    print(f"\n🧪 Grid {'×'.join(map(str, r['grid']))}")
+    print(f"  input            : {f64['input_mb']:9.1f} MB → {f32['input_mb']:9.1f} MB")
+    print(f"  BT/RCR/CI        : {f64['indices_mb']:9.1f} MB → {f32['indices_mb']:9.1f} MB")
+    print(f"  puncak pipeline  : {f64['pipeline_peak_mb']:9.1f} MB → {f32['pipeline_peak_mb']:9.1f} MB"
+          f"  ({f64['pipeline_seconds']:.2f} s → {f32['pipeline_seconds']:.2f} s)")
+    risk = r["risk_grid"]
+    print(f"  grid risiko      : {risk['string_mb']:9.1f} MB → {risk['uint8_mb']:9.1f} MB (string → uint8)")
+    disk = r["disk"]
+    print(f"  NetCDF           : {disk['float64_mb']:9.1f} MB → {disk['int16_zlib_mb']:9.1f} MB (float64 → int16+zlib)")
+
+
+# ==========================================================
+# MAIN
+# ==========================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark kebijakan dtype")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 2000])
+    parser.add_argument("--steps", type=int, default=6)
+    parser.add_argument("--preprocess", action="store_true",
+                        help="sertakan preprocess_all (lambat di grid besar)")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    results = [run_scenario(s, args.steps, args.preprocess) for s in args.sizes]
+    for r in results:
+        print_result(r)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
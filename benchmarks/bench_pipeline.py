@@ -0,0 +1,179 @@
+# ==========================================================
+# bench_pipeline.py
+# Benchmark pipeline reader → indices → detector → report
+# Jalankan: python -m benchmarks.bench_pipeline --sizes 20 500 2000
+# ==========================================================
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from engine.reader import read_sample_data
+from engine.preprocessor import preprocess_all
+from engine.indices import calculate_indices
+from engine.detector import run_detector, run_detector_grid
+from engine.narrator import generate_narrative
+from benchmarks.common import measure
+
+try:
+    from engine.report import generate_pdf_report
+    PDF_SKIP_REASON = None
+except ImportError as e:               # reportlab belum terpasang
+    generate_pdf_report = None
+    PDF_SKIP_REASON = f"ImportError: {e}"
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+REPORT_ROWS = 200                      # baris tabel PDF (skala operasional)
+
+
+# ==========================================================
+# 1️⃣ DATA TAHAP DETEKTOR
+# ==========================================================
+def detector_points(indices_ds, seed=0):
+    """
+    Satu baris per sel grid (slot terakhir) seperti input run_detector
+    shear & cape sintetis, cb_index = CI
+    """
+    ci = indices_ds["CI"].isel(time=-1)
+    lon2d, lat2d = np.meshgrid(ci["lon"].values, ci["lat"].values)
+    rng = np.random.default_rng(seed)
+    n = ci.size
+
+    return pd.DataFrame({
+        "wilayah": np.char.add("sel_", np.arange(n).astype(str)),
+        "lat": lat2d.ravel(),
+        "lon": lon2d.ravel(),
+        "shear": np.round(rng.uniform(5, 20, n), 1),
+        "cape": rng.integers(300, 3000, n),
+        "cb_index": ci.values.ravel(),
+    })
+
+
+# ==========================================================
+# 2️⃣ SATU SKENARIO (UKURAN GRID × TIMESTEP)
+# ==========================================================
+def run_scenario(size, steps, report_dir):
+    records = []
+
+    def stage(name, func, *args, **kwargs):
+        result, metrics = measure(func, *args, **kwargs)
+        records.append({"size": size, "steps": steps, "stage": name, **metrics})
+        print(
+            f"  {name:<20} {metrics['seconds']:8.3f} s | "
+            f"cpu {metrics['cpu_seconds']:8.3f} s | puncak {metrics['peak_mb']:9.1f} MB"
+        )
+        return result
+
+    ds = stage("read_sample_data", read_sample_data, size, size, steps, seed=0)
+    data = stage("preprocess_all", preprocess_all, {"satellite": ds})
+    indices_ds = stage("calculate_indices", calculate_indices, data["satellite"])
+
+    points = detector_points(indices_ds)
+    detected = stage("run_detector", run_detector, points)
+
+    grid = indices_ds.isel(time=-1).assign(
+        shear=(("lat", "lon"), points["shear"].to_numpy().reshape(size, size)),
+        cape=(("lat", "lon"), points["cape"].to_numpy().reshape(size, size)),
+    )
+    stage("run_detector_grid", lambda: run_detector_grid(grid, {"cb_index": "CI"}).values)
+
+    narrative = stage("generate_narrative", generate_narrative, detected)
+
+    if generate_pdf_report is not None:
+        stage(
+            "generate_pdf_report",
+            generate_pdf_report,
+            detected.head(REPORT_ROWS),
+            narrative,
+            output_dir=report_dir,
+        )
+    else:
+        # dicatat eksplisit agar hasil tidak tampak lebih cepat dari commit lain
+        records.append({
+            "size": size, "steps": steps, "stage": "generate_pdf_report",
+            "skipped": True, "reason": PDF_SKIP_REASON,
+        })
+        print(f"  {'generate_pdf_report':<20} dilewati ({PDF_SKIP_REASON})")
+
+    return records
+
+
+# ==========================================================
+# 3️⃣ HASIL & PERBANDINGAN
+# ==========================================================
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline_path):
+    """
+    Cetak rasio waktu & memori terhadap hasil commit lain
+    (tahap yang dilewati di salah satu hasil ditandai, tanpa rasio)
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    key = lambda r: (r["size"], r["steps"], r["stage"])
+    old = {key(r): r for r in baseline["results"]}
+
+    print(f"\n📊 Dibanding {baseline['commit']}:")
+    for r in current["results"]:
+        ref = old.get(key(r))
+        if ref is None:
+            continue
+        if r.get("skipped") or ref.get("skipped"):
+            print(f"  {r['size']:>5}² {r['stage']:<20} dilewati")
+            continue
+        print(
+            f"  {r['size']:>5}² {r['stage']:<20} "
+            f"waktu ×{r['seconds'] / max(ref['seconds'], 1e-9):6.2f} | "
+            f"memori ×{r['peak_mb'] / max(ref['peak_mb'], 1e-9):6.2f}"
+        )
+
+
+# ==========================================================
+# MAIN
+# ==========================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline puting beliung")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 500, 2000])
+    parser.add_argument("--steps", type=int, nargs="+", default=[6])
+    parser.add_argument("--output", help="file JSON hasil (default results/<commit>.json)")
+    parser.add_argument("--compare", help="file JSON hasil lama untuk dibandingkan")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "memory": "tracemalloc peak per tahap",
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as report_dir:
+        for steps in args.steps:
+            for size in args.sizes:
+                print(f"🧪 Grid {steps}×{size}×{size}")
+                results["results"] += run_scenario(size, steps, report_dir)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 {output}")
+
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,28 @@
+# ==========================================================
+# common.py
+# Util bersama benchmark: pengukuran satu pemanggilan
+# ==========================================================
+
+import time
+import tracemalloc
+
+
+def measure(func, *args, **kwargs):
+    """
+    Wall time, CPU time & puncak memori tambahan (tracemalloc)
+    satu pemanggilan
+    Output: (hasil, {"seconds", "cpu_seconds", "peak_mb"})
+    """
+    tracemalloc.start()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        result = func(*args, **kwargs)
+        metrics = {
+            "seconds": time.perf_counter() - wall,
+            "cpu_seconds": time.process_time() - cpu,
+            "peak_mb": tracemalloc.get_traced_memory()[1] / 1e6,
+        }
+    finally:
+        tracemalloc.stop()
+    return result, metrics
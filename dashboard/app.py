@@ -5,12 +5,18 @@
 
 import streamlit as st
 
-from engine.realtime import load_realtime_data
+from engine.realtime import load_realtime_data, current_cycle_time
+from engine.cache import get_result_cache
 from engine.narrator import generate_narrative
 from engine.report import generate_pdf_report
-from engine.logger import setup_logger
+from engine.logger import setup_logger, log_realtime_async
 
-from visualization.plotter import render_realtime_map
+from visualization.plotter import (
+    render_realtime_map,
+    build_map_geojson,
+    viewport_from_state,
+    quantize_viewport,
+)
 
 # ======================
 # KONFIGURASI HALAMAN
@@ -76,14 +82,41 @@ st.markdown(
 )
 
 # ======================
-# LOAD DATA REALTIME
+# LOAD DATA REALTIME (CACHE PER SIKLUS, DIBAGI ANTAR SESI)
 # ======================
+REGION_NAME = "Jawa Timur"
+
+
+def build_cycle_result():
+    df = load_realtime_data()
+    log_realtime_async(df, REGION_NAME)
+
+    try:
+        geojson = build_map_geojson(df)
+    except Exception as e:
+        logger.error(f"GeoJSON build error: {e}")
+        geojson = None
+
+    return {
+        "df": df,
+        "narasi": generate_narrative(df),
+        "geojson": geojson,
+    }
+
+
+cycle_key = (current_cycle_time(), REGION_NAME)
+
 try:
-    df_realtime = load_realtime_data()
+    cycle_result = get_result_cache().get_or_compute(
+        cycle_key,
+        build_cycle_result
+    )
+    df_realtime = cycle_result["df"]
     logger.info("Realtime data loaded")
 except Exception as e:
     st.error("Gagal memuat data realtime")
     logger.error(f"Realtime load error: {e}")
+    cycle_result = {"df": None, "narasi": generate_narrative(None), "geojson": None}
     df_realtime = None
 
 # ======================
@@ -91,11 +124,31 @@ except Exception as e:
 # ======================
 st.subheader("🗺️ Peta Realtime Wilayah Terindikasi")
 
-render_realtime_map(
+# viewport terakhir: hanya fitur di layar yang dikirim ke browser
+bounds, zoom = st.session_state.get("map_viewport", (None, 8))
+
+# viewport dikuantisasi → GeoJSON per (siklus, viewport) dibagi antar sesi
+q_bounds, q_zoom = quantize_viewport(bounds, zoom)
+geojson = cycle_result["geojson"]
+if q_bounds is not None:
+    try:
+        geojson = get_result_cache().get_or_compute(
+            cycle_key + ("geojson", q_bounds, q_zoom),
+            lambda: build_map_geojson(df_realtime, q_bounds, q_zoom)
+        )
+    except Exception as e:
+        logger.error(f"GeoJSON viewport error: {e}")
+        geojson = None
+
+map_state = render_realtime_map(
     realtime_df=df_realtime,
     height=600,
-    internal=is_internal
+    internal=is_internal,
+    geojson=geojson,
+    bounds=bounds,
+    zoom=zoom
 )
+st.session_state["map_viewport"] = viewport_from_state(map_state)
 
 # ======================
 # KONTEN INTERNAL SAJA
@@ -109,7 +162,7 @@ if is_internal:
         st.info("Belum terdapat indikasi signifikan.")
 
     st.subheader("📝 Narasi Operasional BMKG")
-    narasi = generate_narrative(df_realtime)
+    narasi = cycle_result["narasi"]
     st.info(narasi)
 
     # ======================
@@ -0,0 +1,476 @@
+# ==========================================================
+#  CACHE HASIL & DATASET – DIBAGI ANTAR SESI / RERUN
+#  Module : engine/cache.py
+# ==========================================================
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import xarray as xr
+
+from engine.reader import load_event_data, read_observation_csv
+from engine.preprocessor import preprocess_all, preprocess_params
+from engine.indices import calculate_indices
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CACHE_DIR = BASE_DIR / "data" / "cache"
+
+RESULT_CACHE_SIZE = 64                 # entri di memori (LRU)
+RESULT_CACHE_TTL = 15 * 60             # detik
+RESULT_CACHE_DISK = CACHE_DIR / "results"
+RESULT_CACHE_DISK_SIZE = 256           # file pickle maksimum di tier disk
+
+DATASET_CACHE_DIR = CACHE_DIR / "datasets"
+DATASET_CACHE_MAX_BYTES = 5 * 1024 ** 3   # total NetCDF di disk (LRU)
+DATASET_CACHE_VERSION = 1                 # naikkan bila rumus indeks berubah
+HASH_INDEX_NAME = ".hash_index.json"
+HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+# ======================
+# CACHE TTL + LRU (+ DISK OPSIONAL)
+# ======================
+class ResultCache:
+    """
+    Cache in-process, thread-safe, dengan TTL dan eviksi LRU
+    disk_dir: tier disk opsional (pickle) agar tahan restart proses,
+    dibatasi TTL dan disk_maxsize file (dipangkas saat set)
+    """
+
+    def __init__(
+        self,
+        maxsize=RESULT_CACHE_SIZE,
+        ttl=RESULT_CACHE_TTL,
+        disk_dir=None,
+        disk_maxsize=RESULT_CACHE_DISK_SIZE,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_maxsize = disk_maxsize
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0}
+
+    # ------------------
+    # TIER DISK
+    # ------------------
+    def _disk_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return self.disk_dir / f"{digest}.pkl"
+
+    def _disk_get(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "rb") as f:
+                expires, value = pickle.load(f)
+        except OSError:
+            return None
+        except Exception:
+            # pickle rusak / basi (kelas berubah setelah update kode)
+            path.unlink(missing_ok=True)
+            return None
+        if expires < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        return expires, value
+
+    def _disk_set(self, key, expires, value):
+        if self.disk_dir is None:
+            return
+        self.disk_dir.mkdir(parents=True, exist_ok=True)
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump((expires, value), f)
+        # mtime = waktu kedaluwarsa → prune tanpa membuka pickle
+        os.utime(tmp_path, (expires, expires))
+        tmp_path.replace(path)
+        self._disk_prune()
+
+    def _disk_prune(self, max_files=None):
+        """
+        Hapus file kedaluwarsa, lalu yang paling cepat kedaluwarsa
+        sampai jumlah file <= max_files
+        """
+        if self.disk_dir is None:
+            return 0
+        max_files = self.disk_maxsize if max_files is None else max_files
+
+        now = time.time()
+        entries = []
+        for path in self.disk_dir.glob("*.pkl"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        entries.sort()
+
+        removed = 0
+        for i, (expires, path) in enumerate(entries):
+            if expires >= now and len(entries) - i <= max_files:
+                break
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    # ------------------
+    # API
+    # ------------------
+    def get(self, key, default=None):
+        """
+        Ambil nilai; entri kedaluwarsa dianggap tidak ada
+        """
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires >= now:
+                    self._data.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._data[key]
+
+        item = self._disk_get(key)
+        if item is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return default
+
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._store(key, *item)
+        return item[1]
+
+    def _store(self, key, expires, value):
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def set(self, key, value, ttl=None):
+        """
+        Simpan nilai (memori + disk bila aktif)
+        """
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store(key, expires, value)
+        self._disk_set(key, expires, value)
+
+    def get_or_compute(self, key, func, ttl=None):
+        """
+        Ambil dari cache atau hitung sekali saja;
+        sesi lain yang meminta key sama menunggu hasil yang sama
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            value = self.get(key, missing)
+            if value is missing:
+                value = func()
+                self.set(key, value, ttl=ttl)
+
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        self._disk_prune(max_files=0)
+
+
+_result_cache = {"instance": None}
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache(disk=True):
+    """
+    Satu ResultCache per proses (dibagi semua sesi Streamlit)
+    """
+    with _result_cache_lock:
+        if _result_cache["instance"] is None:
+            _result_cache["instance"] = ResultCache(
+                disk_dir=RESULT_CACHE_DISK if disk else None
+            )
+        return _result_cache["instance"]
+
+
+# ======================
+# HASH KONTEN FILE INPUT
+# ======================
+def file_digest(file_path, index_path=None):
+    """
+    SHA-256 isi file; disimpan per (size, mtime) di HASH_INDEX_NAME
+    sehingga file yang tidak berubah tidak di-hash ulang
+    """
+    file_path = Path(file_path).resolve()
+    index_path = Path(index_path or DATASET_CACHE_DIR / HASH_INDEX_NAME)
+    stat = file_path.stat()
+
+    index = {}
+    if index_path.exists():
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+
+    entry = index.get(str(file_path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+
+    index[str(file_path)] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(f"{index_path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+
+    return digest.hexdigest()
+
+
+def dataset_key(stage, inputs, params):
+    """
+    Kunci content-addressed: tahap + hash input + parameter
+    Parameter berubah → kunci berubah → entri lama tidak terpakai
+    """
+    payload = json.dumps(
+        {
+            "version": DATASET_CACHE_VERSION,
+            "stage": stage,
+            "inputs": inputs,
+            "params": params,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ======================
+# CACHE DATASET DI DISK (NETCDF, LRU PER UKURAN)
+# ======================
+class DatasetCache:
+    """
+    Cache Dataset xarray di disk (satu NetCDF per kunci)
+    Lossless (zlib, dtype asli); waktu akses = mtime file,
+    entri terlama dibuang bila total > max_bytes
+    """
+
+    def __init__(self, cache_dir=DATASET_CACHE_DIR, max_bytes=DATASET_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.nc"
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _load(self, key):
+        """
+        Dataset (sudah di-load) atau None, tanpa mengubah stats
+        """
+        path = self._path(key)
+        if not path.exists():
+            return None
+
+        try:
+            with xr.open_dataset(path) as ds:
+                ds = ds.load()
+        except (OSError, ValueError):
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return ds
+
+    def get(self, key):
+        """
+        Dataset (sudah di-load) atau None; dihitung di stats hits/misses
+        """
+        ds = self._load(key)
+        self._count("misses" if ds is None else "hits")
+        return ds
+
+    def set(self, key, ds):
+        """
+        Tulis Dataset (atomic replace), lalu eviksi LRU
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = self.cache_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+
+        ds = ds.drop_encoding()
+        encoding = {
+            name: {"zlib": True, "complevel": 1}
+            for name, da in ds.data_vars.items()
+            if da.dtype.kind in "fiub"
+        }
+        try:
+            ds.to_netcdf(tmp_path, encoding=encoding)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        self.evict()
+        return path
+
+    def get_or_compute(self, key, func):
+        """
+        Ambil dari disk atau hitung sekali (thread lain menunggu)
+        """
+        ds = self.get(key)
+        if ds is not None:
+            return ds
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # cek ulang (thread lain mungkin sudah menghitung);
+            # miss sudah tercatat di atas
+            ds = self._load(key)
+            if ds is None:
+                ds = func()
+                self.set(key, ds)
+
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return ds
+
+    def evict(self, max_bytes=None):
+        """
+        Buang entri paling lama tidak diakses sampai total <= max_bytes
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for path in self.cache_dir.glob("*.nc"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self._count("evictions")
+
+        return total
+
+    def clear(self):
+        self.evict(max_bytes=0)
+
+
+_dataset_cache = {"instance": None}
+
+
+def get_dataset_cache():
+    """
+    Satu DatasetCache per proses
+    """
+    with _result_cache_lock:
+        if _dataset_cache["instance"] is None:
+            _dataset_cache["instance"] = DatasetCache()
+        return _dataset_cache["instance"]
+
+
+# ======================
+# PIPELINE KEJADIAN DENGAN CACHE
+# ======================
+def cached_event_pipeline(
+    sat_file=None,
+    nwp_file=None,
+    obs_file=None,
+    region_bbox=None,
+    time_range=None,
+    cache=None,
+    workers=1,
+):
+    """
+    load_event_data → preprocess_all → calculate_indices, dengan hasil
+    preprocessing & indeks di-cache per hash file input + parameter
+    (window, QC_RANGES, dsb; lihat preprocess_params)
+    Output: (dict data terpreproses, Dataset indeks | None)
+    """
+    cache = cache or get_dataset_cache()
+    params = {
+        "read": {"region_bbox": region_bbox, "time_range": time_range},
+        "preprocess": preprocess_params(),
+    }
+
+    def preprocess_one(kind, file_arg, file_path):
+        raw = load_event_data(
+            **{file_arg: file_path},
+            region_bbox=region_bbox,
+            time_range=time_range,
+        )
+        return preprocess_all(raw, workers=workers)[kind]
+
+    data = {}
+    digests = {}
+    sources = (("satellite", "sat_file", sat_file), ("nwp", "nwp_file", nwp_file))
+    for kind, file_arg, file_path in sources:
+        if not file_path:
+            continue
+        digests[kind] = file_digest(file_path)
+        key = dataset_key("preprocess", {kind: digests[kind]}, params)
+        data[kind] = cache.get_or_compute(
+            key, lambda: preprocess_one(kind, file_arg, file_path)
+        )
+
+    if obs_file:
+        data["observation"] = read_observation_csv(obs_file)
+
+    indices_ds = None
+    if "satellite" in data:
+        key = dataset_key("indices", {"satellite": digests["satellite"]}, params)
+        indices_ds = cache.get_or_compute(
+            key, lambda: calculate_indices(data["satellite"])
+        )
+
+    return data, indices_ds
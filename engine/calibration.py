@@ -0,0 +1,213 @@
+# ==========================================================
+#  KALIBRASI AMBANG – SWEEP / SENSITIVITAS THRESHOLDS
+#  Module : engine/calibration.py
+# ==========================================================
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+from engine.detector import LEVELS, LEVEL_MIN_SCORE, THRESHOLDS
+
+# ======================
+# PARAMETER SWEEP
+# ======================
+SWEEP_VARS = list(THRESHOLDS)                    # shear, cape, cb_index
+SWEEP_FACTORS = (0.75, 1.0, 1.25)                # kandidat default = THRESHOLDS × faktor
+SWEEP_BLOCK_CELLS = 1 << 22                      # kombinasi × sel per blok (memori)
+WARN_LEVEL = "SIAGA"                             # peringatan bila level >= ini
+
+
+# ======================
+# KANDIDAT AMBANG
+# ======================
+def default_candidates(factors=SWEEP_FACTORS):
+    """
+    Kandidat per variabel: semua nilai THRESHOLDS dikali faktor
+    """
+    return {
+        var: sorted({v * f for v in THRESHOLDS[var].values() for f in factors})
+        for var in SWEEP_VARS
+    }
+
+
+def candidate_triples(spec):
+    """
+    Tripel ambang (WASPADA, SIAGA, AWAS) satu variabel
+    spec: daftar nilai (→ semua kombinasi naik) atau daftar tripel
+    Output: array (n, 3)
+    """
+    spec = list(spec)
+    if spec and np.ndim(spec[0]) == 0:
+        triples = np.array(list(combinations(sorted(set(spec)), len(LEVELS))), dtype=float)
+    else:
+        triples = np.asarray(spec, dtype=float)
+
+    if triples.ndim != 2 or triples.shape[1] != len(LEVELS) or len(triples) == 0:
+        raise ValueError(f"Kandidat harus berisi tripel {LEVELS}")
+    if (np.diff(triples, axis=1) < 0).any():
+        raise ValueError("Ambang harus naik: WASPADA <= SIAGA <= AWAS")
+    return triples
+
+
+# ======================
+# BIN & TABEL SKOR (DIHITUNG SEKALI)
+# ======================
+def bin_indices(values, edges):
+    """
+    Indeks bin tiap sampel: jumlah ambang kandidat <= nilai
+    (nilai >= edges[j] ⇔ bin > j; NaN = 0, sama dengan score_variable)
+    """
+    values = np.asarray(values, dtype=float)
+    bins = np.searchsorted(edges, values, side="right")
+    bins[np.isnan(values)] = 0
+    return bins
+
+
+def score_table(triples, edges):
+    """
+    Skor 0-3 per (tripel, bin): jumlah ambang tripel yang terlampaui
+    Output: array uint8 (n_tripel, len(edges) + 1)
+    """
+    pos = np.searchsorted(edges, triples)
+    bins = np.arange(len(edges) + 1)
+    return (bins[None, None, :] > pos[:, :, None]).sum(axis=1).astype(np.uint8)
+
+
+def compress_samples(bins, events):
+    """
+    Gabungkan sampel dengan kombinasi bin yang sama
+    Output: (sel unik (n_sel, n_var), jumlah kejadian, jumlah non-kejadian)
+    """
+    keys = np.stack(bins, axis=1)
+    cells, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+
+    n_cells = len(cells)
+    n_events = np.bincount(inverse, weights=events, minlength=n_cells)
+    n_total = np.bincount(inverse, minlength=n_cells)
+    return cells, n_events, n_total - n_events
+
+
+# ======================
+# EVALUASI PER BLOK KOMBINASI
+# ======================
+def _sweep_range(cell_scores, n_events, n_nonevents, min_score, start, stop):
+    """
+    Hits & false alarm untuk kombinasi [start, stop)
+    cell_scores: list per variabel, array uint8 (n_tripel, n_sel)
+    """
+    shape = tuple(len(cs) for cs in cell_scores)
+    idx = np.unravel_index(np.arange(start, stop), shape)
+
+    total = cell_scores[0][idx[0]].copy()
+    for cs, i in zip(cell_scores[1:], idx[1:]):
+        total += cs[i]
+
+    warn = (total >= min_score).astype(np.float64)
+    return warn @ n_events, warn @ n_nonevents
+
+
+def _block_ranges(n_combos, n_cells, block_cells=SWEEP_BLOCK_CELLS):
+    step = max(1, block_cells // max(n_cells, 1))
+    return [(a, min(a + step, n_combos)) for a in range(0, n_combos, step)]
+
+
+# ======================
+# SWEEP ENGINE
+# ======================
+def sweep_thresholds(
+    history_df,
+    candidates=None,
+    warn_level=WARN_LEVEL,
+    event_col="event",
+    workers=1,
+    block_cells=SWEEP_BLOCK_CELLS,
+):
+    """
+    Evaluasi semua kombinasi ambang terhadap data historis sekaligus
+    history_df: kolom shear, cape, cb_index + event_col (True = kejadian)
+    candidates: {var: nilai | tripel}; default default_candidates()
+    warn_level: level minimum yang dihitung sebagai peringatan
+    workers   : > 1 → blok kombinasi dihitung paralel antar proses
+
+    Output: DataFrame satu baris per kombinasi:
+    ambang (<var>_<level>), hits, misses, false_alarms,
+    correct_negatives, pod, far, csi
+    """
+    if warn_level not in LEVELS:
+        raise ValueError(f"Level {warn_level} tidak dikenal")
+    for col in SWEEP_VARS + [event_col]:
+        if col not in history_df.columns:
+            raise ValueError(f"Kolom '{col}' tidak ditemukan")
+
+    candidates = candidates or default_candidates()
+    triples = [candidate_triples(candidates[var]) for var in SWEEP_VARS]
+    edges = [np.unique(t) for t in triples]
+
+    # 1) bin tiap sampel — sekali untuk semua kombinasi
+    bins = [
+        bin_indices(history_df[var].to_numpy(), e)
+        for var, e in zip(SWEEP_VARS, edges)
+    ]
+    events = history_df[event_col].to_numpy().astype(bool)
+    cells, n_events, n_nonevents = compress_samples(bins, events)
+
+    # 2) skor per (tripel, sel unik) lewat lookup table
+    cell_scores = [
+        score_table(t, e)[:, cells[:, k]]
+        for k, (t, e) in enumerate(zip(triples, edges))
+    ]
+
+    # 3) semua kombinasi, per blok
+    min_score = LEVEL_MIN_SCORE.get(warn_level, 0)
+    shape = tuple(len(t) for t in triples)
+    n_combos = int(np.prod(shape))
+    ranges = _block_ranges(n_combos, len(cells), block_cells)
+    args = (cell_scores, n_events, n_nonevents, min_score)
+
+    if workers > 1 and len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(
+                _sweep_range, *zip(*[args + r for r in ranges])
+            ))
+    else:
+        parts = [_sweep_range(*args, *r) for r in ranges]
+
+    hits = np.concatenate([p[0] for p in parts]).astype(np.int64)
+    false_alarms = np.concatenate([p[1] for p in parts]).astype(np.int64)
+    misses = int(n_events.sum()) - hits
+    correct_negatives = int(n_nonevents.sum()) - false_alarms
+
+    # 4) tabel hasil
+    idx = np.unravel_index(np.arange(n_combos), shape)
+    table = {}
+    for var, t, i in zip(SWEEP_VARS, triples, idx):
+        for j, level in enumerate(LEVELS):
+            table[f"{var}_{level.lower()}"] = t[i, j]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table.update({
+            "hits": hits,
+            "misses": misses,
+            "false_alarms": false_alarms,
+            "correct_negatives": correct_negatives,
+            "pod": hits / (hits + misses),
+            "far": false_alarms / (hits + false_alarms),
+            "csi": hits / (hits + misses + false_alarms),
+        })
+
+    return pd.DataFrame(table)
+
+
+def to_thresholds(row):
+    """
+    Satu baris hasil sweep → dict format THRESHOLDS
+    """
+    return {
+        var: {level: float(row[f"{var}_{level.lower()}"]) for level in LEVELS}
+        for var in SWEEP_VARS
+    }
+
@@ -3,8 +3,12 @@
 #  Module : engine/detector.py
 # ==========================================================
 
+import numpy as np
 import pandas as pd
 
+from engine.dtypes import decode_codes
+from engine.metrics import instrumented
+
 # ======================
 # PARAMETER AMBANG (AWAL)
 # ======================
@@ -26,6 +30,16 @@ THRESHOLDS = {
     }
 }
 
+# ======================
+# URUTAN LEVEL & SKOR MINIMUM
+# ======================
+LEVELS = ["WASPADA", "SIAGA", "AWAS"]
+
+LEVEL_MIN_SCORE = {
+    "SIAGA": 4,
+    "AWAS": 7
+}
+
 # ======================
 # HITUNG LEVEL
 # ======================
@@ -63,11 +77,16 @@ def classify_level(shear, cape, cb_index):
 # ======================
 # DETECTION ENGINE
 # ======================
-def run_detector(input_df):
+@instrumented("run_detector")
+def run_detector(input_df, vectorized=True):
     """
     input_df minimal kolom:
     wilayah, lat, lon, shear, cape, cb_index
+
+    vectorized=False memakai jalur skalar per baris (referensi)
     """
+    if vectorized:
+        return run_detector_batch(input_df)
 
     results = []
 
@@ -90,3 +109,117 @@ def run_detector(input_df):
         })
 
     return pd.DataFrame(results)
+
+
+# ======================
+# SKOR VEKTOR (NUMPY)
+# ======================
+def score_variable(values, var):
+    """
+    Skor 0-3 satu variabel berdasarkan THRESHOLDS
+    (jumlah ambang yang terlampaui, NaN = 0)
+    """
+    values = np.asarray(values, dtype=float)
+    score = np.zeros(values.shape, dtype=np.uint8)
+
+    for level in LEVELS:
+        score += values >= THRESHOLDS[var][level]
+
+    return score
+
+
+def level_codes_from_score(score):
+    """
+    Skor total → kode level (0=WASPADA, 1=SIAGA, 2=AWAS)
+    """
+    score = np.asarray(score)
+    codes = np.zeros(score.shape, dtype=np.uint8)
+    codes[score >= LEVEL_MIN_SCORE["SIAGA"]] = 1
+    codes[score >= LEVEL_MIN_SCORE["AWAS"]] = 2
+    return codes
+
+
+# ======================
+# DETECTION ENGINE (BATCH)
+# ======================
+def run_detector_batch(input_df):
+    """
+    Versi vektor run_detector: kolom & level identik
+    dengan jalur skalar classify_level
+    """
+    if input_df is None or input_df.empty:
+        return pd.DataFrame([])
+
+    score = (
+        score_variable(input_df["shear"], "shear")
+        + score_variable(input_df["cape"], "cape")
+        + score_variable(input_df["cb_index"], "cb_index")
+    )
+    codes = level_codes_from_score(score)
+
+    result = pd.DataFrame({
+        "wilayah": input_df["wilayah"].to_numpy(),
+        "lat": input_df["lat"].to_numpy(),
+        "lon": input_df["lon"].to_numpy(),
+        "level": np.asarray(LEVELS, dtype=object)[codes],
+        "shear": input_df["shear"].to_numpy(),
+        "cape": input_df["cape"].to_numpy(),
+        "cb_index": input_df["cb_index"].to_numpy(),
+    })
+
+    result["keterangan"] = (
+        "Shear=" + input_df["shear"].map(str).to_numpy(dtype=object)
+        + " kt | CAPE=" + input_df["cape"].map(str).to_numpy(dtype=object)
+        + " J/kg | CbIndex=" + input_df["cb_index"].map(str).to_numpy(dtype=object)
+    )
+
+    return result
+
+
+# ======================
+# DETECTION ENGINE (GRID / XARRAY)
+# ======================
+def run_detector_grid(ds, var_map=None):
+    """
+    Detector langsung pada grid xarray (lazy, aman untuk chunk dask)
+    Output: DataArray uint8 kode level per sel
+    (0=WASPADA, 1=SIAGA, 2=AWAS)
+
+    var_map: nama variabel di dataset per kunci THRESHOLDS,
+    misal {"cb_index": "CI"}
+    """
+    names = {var: var for var in THRESHOLDS}
+    if var_map:
+        names.update(var_map)
+
+    for name in names.values():
+        if name not in ds:
+            raise ValueError(f"{name} tidak ditemukan")
+
+    score = None
+    for var, name in names.items():
+        field = ds[name]
+        for level in LEVELS:
+            # ambang float64 → perbandingan identik dengan jalur skalar
+            # untuk field float32
+            hit = (field >= np.float64(THRESHOLDS[var][level])).astype(np.uint8)
+            score = hit if score is None else score + hit
+
+    level = (
+        (score >= LEVEL_MIN_SCORE["SIAGA"]).astype(np.uint8)
+        + (score >= LEVEL_MIN_SCORE["AWAS"]).astype(np.uint8)
+    )
+
+    level.name = "level"
+    level.attrs["flag_values"] = np.arange(len(LEVELS), dtype=np.uint8)
+    level.attrs["flag_meanings"] = " ".join(LEVELS)
+    level.attrs["description"] = "Level potensi puting beliung per sel"
+
+    return level
+
+
+def level_names(codes):
+    """
+    Kode level uint8 → nama level (WASPADA/SIAGA/AWAS)
+    """
+    return decode_codes(codes, LEVELS)
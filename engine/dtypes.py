@@ -0,0 +1,111 @@
+# ==========================================================
+#  KEBIJAKAN DTYPE – FLOAT32 / UINT8 / INT16 (DISK)
+#  Module : engine/dtypes.py
+# ==========================================================
+
+import numpy as np
+
+# ======================
+# DTYPE INTERNAL
+# ======================
+FIELD_DTYPE = np.float32               # BT, RCR, CI, NWP (presisi ~1e-7 relatif)
+CODE_DTYPE = np.uint8                  # kode level / risiko (lihat flag_meanings)
+
+# ======================
+# ENCODING DISK (INT16 BERSKALA)
+# ======================
+DISK_DTYPE = "int16"
+DISK_FILL_VALUE = np.iinfo(np.int16).min
+
+# variabel: (scale_factor, add_offset) → rentang ±327.67 * scale di sekitar offset
+DISK_SCALE = {
+    "BT_IR": (0.01, 250.0),            # 0.01 K, 22.3 - 577.7 K
+    "RCR": (0.01, 0.0),                # 0.01 K/10min
+    "CI": (0.001, 0.0),                # 0 - 1
+    "shear": (0.01, 0.0),              # m/s
+    "cape": (0.5, 0.0),                # J/kg, s.d. 16383
+}
+
+NETCDF_COMPRESSION = {"zlib": True, "complevel": 4, "shuffle": True}
+
+
+# ======================
+# KEBIJAKAN DI MEMORI
+# ======================
+def apply_dtype_policy(ds, dtype=FIELD_DTYPE):
+    """
+    Cast semua data_vars float ke FIELD_DTYPE (koordinat tidak diubah)
+    Lazy untuk data dask; variabel yang sudah sesuai tidak disalin
+    """
+    casts = {
+        name: da.astype(dtype)
+        for name, da in ds.data_vars.items()
+        if da.dtype.kind == "f" and da.dtype != dtype
+    }
+    if not casts:
+        return ds
+    return ds.assign(casts)
+
+
+# ======================
+# KODE LEVEL (LOOKUP TABLE)
+# ======================
+def encode_codes(names, levels):
+    """
+    Nama level → kode uint8 sesuai urutan levels
+    """
+    lookup = {name: code for code, name in enumerate(levels)}
+    names = np.asarray(names, dtype=object)
+    codes = np.fromiter(
+        (lookup[n] for n in names.ravel()), dtype=CODE_DTYPE, count=names.size
+    )
+    return codes.reshape(names.shape)
+
+
+def decode_codes(codes, levels):
+    """
+    Kode uint8 → nama level (lookup table, tanpa loop Python)
+    """
+    return np.asarray(levels, dtype=object)[np.asarray(codes)]
+
+
+def flag_levels(da):
+    """
+    Daftar level dari attrs flag_meanings (konvensi CF)
+    """
+    return da.attrs["flag_meanings"].split()
+
+
+# ======================
+# ENCODING DISK
+# ======================
+def disk_encoding(ds, fmt="netcdf"):
+    """
+    Encoding to_netcdf / to_zarr sesuai kebijakan:
+    DISK_SCALE → int16 berskala, kode (flag_meanings) → uint8,
+    float lain → float32
+    fmt: "netcdf" (zlib) | "zarr" (kompresor default store)
+    """
+    encoding = {}
+    for name, da in ds.data_vars.items():
+        if name in DISK_SCALE:
+            scale, offset = DISK_SCALE[name]
+            # skala float32 → didekode kembali sebagai float32
+            enc = {
+                "dtype": DISK_DTYPE,
+                "scale_factor": np.float32(scale),
+                "add_offset": np.float32(offset),
+                "_FillValue": DISK_FILL_VALUE,
+            }
+        elif "flag_meanings" in da.attrs:
+            enc = {"dtype": "uint8"}
+        elif da.dtype.kind == "f":
+            enc = {"dtype": "float32"}
+        else:
+            continue
+
+        if fmt == "netcdf":
+            enc.update(NETCDF_COMPRESSION)
+        encoding[name] = enc
+
+    return encoding
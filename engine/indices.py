@@ -7,6 +7,9 @@
 import numpy as np
 import xarray as xr
 
+from engine.dtypes import FIELD_DTYPE, decode_codes
+from engine.metrics import instrumented
+
 # ==========================================================
 # 1️⃣ RAPID COOLING RATE (RCR)
 # ==========================================================
@@ -58,19 +61,20 @@ def convective_indicator(ds):
 def composite_index(ds):
     """
     Composite Index Puting Beliung
-    Skala 0 - 1
+    Skala 0 - 1 (FIELD_DTYPE)
     """
-    score = xr.zeros_like(ds["BT_IR"])
+    zero = FIELD_DTYPE(0)
+    score = xr.zeros_like(ds["BT_IR"], dtype=FIELD_DTYPE)
 
     # Faktor 1: BT dingin
-    score = score + xr.where(ds["BT_IR"] < 235, 0.4, 0)
+    score = score + xr.where(ds["BT_IR"] < 235, FIELD_DTYPE(0.4), zero)
 
     # Faktor 2: pendinginan cepat
     if "RCR" in ds:
-        score = score + xr.where(ds["RCR"] > 3, 0.4, 0)
+        score = score + xr.where(ds["RCR"] > 3, FIELD_DTYPE(0.4), zero)
 
     # Faktor 3: awan sangat dingin
-    score = score + xr.where(ds["BT_IR"] < 220, 0.2, 0)
+    score = score + xr.where(ds["BT_IR"] < 220, FIELD_DTYPE(0.2), zero)
 
     score = score.clip(0, 1)
     score.name = "CI"
@@ -84,6 +88,7 @@ def composite_index(ds):
 # ==========================================================
 # 4️⃣ PIPELINE HITUNG INDEKS
 # ==========================================================
+@instrumented("calculate_indices")
 def calculate_indices(ds):
     """
     Pipeline perhitungan indeks
@@ -109,6 +114,8 @@ def calculate_indices(ds):
 def classify_risk(ci):
     """
     Klasifikasi risiko berdasarkan CI
+    Grid string (<U6, 24 byte/sel); untuk grid besar pakai
+    classify_risk_code (uint8) + risk_names
     """
     return xr.where(
         ci >= 0.7, "TINGGI",
@@ -116,6 +123,153 @@ def classify_risk(ci):
     )
 
 
+# ==========================================================
+# 6️⃣ KERNEL CI TERFUSI (FLOAT32 / UINT8)
+# ==========================================================
+RISK_LEVELS = ["RENDAH", "SEDANG", "TINGGI"]
+
+
+def classify_risk_code(ci):
+    """
+    Klasifikasi risiko sebagai kode uint8
+    (0=RENDAH, 1=SEDANG, 2=TINGGI; lihat RISK_LEVELS)
+    """
+    code = (ci >= 0.4).astype(np.uint8) + (ci >= 0.7).astype(np.uint8)
+    if isinstance(code, xr.DataArray):
+        code.name = "RISK"
+        code.attrs["flag_meanings"] = " ".join(RISK_LEVELS)
+    return code
+
+
+def risk_names(codes):
+    """
+    Kode risiko uint8 → nama (RENDAH/SEDANG/TINGGI)
+    """
+    return decode_codes(codes, RISK_LEVELS)
+
+
+def composite_index_fused(ds, with_risk=False, out=None, risk_out=None):
+    """
+    Composite Index satu lintasan per frame waktu
+    Skor dihitung dalam persepuluhan (uint8) lalu ditulis ke buffer
+    float32 (out=), tanpa array sementara seukuran grid penuh
+
+    with_risk: sekaligus hasilkan kode risiko uint8 (risk_out=)
+    Output: DataArray CI [, DataArray RISK]
+    """
+    bt_da = ds["BT_IR"]
+    bt = np.asarray(bt_da.values)
+    rcr = None
+    if "RCR" in ds:
+        rcr = np.asarray(ds["RCR"].transpose(*bt_da.dims).values)
+
+    shape = bt.shape
+    n_frames = shape[0] if bt.ndim >= 3 else 1
+    frame_shape = shape[1:] if bt.ndim >= 3 else shape
+
+    if out is None:
+        out = np.empty(shape, dtype=np.float32)
+    if with_risk and risk_out is None:
+        risk_out = np.empty(shape, dtype=np.uint8)
+
+    bt_frames = bt.reshape((n_frames,) + frame_shape)
+    rcr_frames = None if rcr is None else rcr.reshape((n_frames,) + frame_shape)
+    ci_frames = out.reshape((n_frames,) + frame_shape)
+    risk_frames = None if not with_risk else risk_out.reshape((n_frames,) + frame_shape)
+
+    # buffer satu frame, dipakai ulang
+    tenths = np.empty(frame_shape, dtype=np.uint8)
+    mask = np.empty(frame_shape, dtype=bool)
+
+    for t in range(n_frames):
+        tenths.fill(0)
+
+        # Faktor 1: BT dingin
+        np.less(bt_frames[t], 235, out=mask)
+        np.add(tenths, 4, out=tenths, where=mask)
+
+        # Faktor 2: pendinginan cepat
+        if rcr_frames is not None:
+            np.greater(rcr_frames[t], 3, out=mask)
+            np.add(tenths, 4, out=tenths, where=mask)
+
+        # Faktor 3: awan sangat dingin
+        np.less(bt_frames[t], 220, out=mask)
+        np.add(tenths, 2, out=tenths, where=mask)
+
+        np.minimum(tenths, 10, out=tenths)
+        np.divide(tenths, 10, out=ci_frames[t])
+
+        if with_risk:
+            np.greater_equal(tenths, 4, out=mask)
+            np.copyto(risk_frames[t], mask)
+            np.greater_equal(tenths, 7, out=mask)
+            np.add(risk_frames[t], 1, out=risk_frames[t], where=mask)
+
+    ci = xr.DataArray(out, coords=bt_da.coords, dims=bt_da.dims, name="CI")
+    ci.attrs["description"] = "Composite Index Puting Beliung"
+    ci.attrs["scale"] = "0 (rendah) - 1 (tinggi)"
+
+    if not with_risk:
+        return ci
+
+    risk = xr.DataArray(risk_out, coords=bt_da.coords, dims=bt_da.dims, name="RISK")
+    risk.attrs["flag_meanings"] = " ".join(RISK_LEVELS)
+    return ci, risk
+
+
+# ==========================================================
+# 7️⃣ INDEKS INKREMENTAL (REALTIME PER SLOT)
+# ==========================================================
+def update_indices(frame, state=None, bt_var="BT_IR"):
+    """
+    Hitung RCR & CI hanya untuk slot waktu baru
+    frame : Dataset berisi timestep baru (biasanya 1 slot 10 menit)
+    state : dict hasil pemanggilan sebelumnya (None = awal deret)
+    Output: (Dataset indeks slot baru, state baru)
+
+    Hasil identik dengan calculate_indices pada deret lengkap
+    """
+    state = dict(state or {})
+    outputs = []
+
+    for i in range(frame.sizes["time"]):
+        step = frame.isel(time=[i])
+        time = step["time"].values[0]
+
+        last_time = state.get("last_time")
+        if last_time is not None and time <= last_time:
+            raise ValueError(f"Slot {time} tidak lebih baru dari {last_time}")
+
+        output = step.copy()
+
+        if "RCR" not in output and bt_var in output:
+            bt = output[bt_var]
+            prev_bt = state.get("prev_bt")
+
+            if prev_bt is None:
+                rcr = xr.full_like(bt, np.nan)
+            else:
+                if prev_bt.shape != bt.shape:
+                    raise ValueError("Grid slot baru berbeda dengan slot sebelumnya")
+                rcr = (bt - prev_bt) * -1
+
+            rcr.name = "RCR"
+            rcr.attrs["unit"] = "K/10min"
+            rcr.attrs["description"] = "Rapid Cooling Rate"
+            output["RCR"] = rcr
+
+            state["prev_bt"] = bt.values
+
+        output["CI"] = composite_index(output)
+        output.attrs["indices"] = "BMKG Convective Indices"
+
+        state["last_time"] = time
+        outputs.append(output)
+
+    return xr.concat(outputs, dim="time"), state
+
+
 # ==========================================================
 # MAIN TEST
 # ==========================================================
@@ -3,41 +3,314 @@
 # Logging Operasional Puting Beliung
 # ==========================================================
 
+import atexit
 import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import uuid
 from pathlib import Path
 from datetime import datetime
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as pads
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 
-CSV_LOG = LOG_DIR / "realtime_log.csv"
-JSON_LOG = LOG_DIR / "event_log.json"
+CSV_LOG = LOG_DIR / "realtime_log.csv"  # format lama (lihat migrate_csv_log)
+JSON_LOG = LOG_DIR / "event_log.json"   # format lama (lihat migrate_json_log)
+
+# ======================
+# REALTIME LOG (PARQUET, PARTISI date/region)
+# ======================
+REALTIME_DIR = LOG_DIR / "realtime"
+REALTIME_FLUSH_ROWS = 5000             # flush bila buffer >= N baris
+REALTIME_FLUSH_SECONDS = 60.0          # atau bila buffer lebih tua dari ini
+
+REALTIME_PARTITIONING = pads.partitioning(
+    pa.schema([("date", pa.string()), ("region", pa.string())]),
+    flavor="hive",
+)
+
+# skema tetap: semua batch ditulis & dibaca dengan tipe yang sama
+# (mis. cape int dari data sintetis vs float dari zonal stats)
+REALTIME_SCHEMA = pa.schema([
+    ("wilayah", pa.string()),
+    ("lat", pa.float64()),
+    ("lon", pa.float64()),
+    ("level", pa.string()),
+    ("shear", pa.float64()),
+    ("cape", pa.float64()),
+    ("cb_index", pa.float64()),
+    ("keterangan", pa.string()),
+    ("timestamp", pa.string()),
+    ("logged_at", pa.timestamp("ns")),
+    ("date", pa.string()),
+    ("region", pa.string()),
+])
+
+_realtime_lock = threading.Lock()
+_realtime_buffer = {"frames": [], "rows": 0, "since": None}
+
+# ======================
+# EVENT STORE (JSON LINES)
+# ======================
+EVENT_DIR = LOG_DIR / "events"
+EVENT_MAX_BYTES = 10 * 1024 * 1024     # rotasi segmen per ukuran
+FSYNC_POLICY = "interval"              # "always" | "interval" | "never"
+FSYNC_INTERVAL = 5.0                   # detik (policy "interval")
+
+_event_lock = threading.Lock()
+_event_state = {"last_fsync": 0.0}
+
+# ======================
+# LOGGER APLIKASI & ANTREAN LATAR BELAKANG
+# ======================
+APP_LOG = LOG_DIR / "app.log"
+QUEUE_MAXSIZE = 1000                   # antrean tulis terbatas
+QUEUE_POLICY = "drop_oldest"           # "drop_oldest" | "drop_newest" | "block"
+QUEUE_BATCH_SIZE = 100
+QUEUE_FLUSH_INTERVAL = 1.0             # detik
+
+_app_loggers = {}
+_writer_lock = threading.Lock()
+_writer = {"instance": None}
 
 
 # ==========================================================
-# 1️⃣ LOG WAKTU-KE-WAKTU (CSV)
+# 1️⃣ LOG WAKTU-KE-WAKTU (PARQUET TERPARTISI)
 # ==========================================================
-def log_realtime(decision_df, region_name):
+def log_realtime(decision_df, region_name, flush=False):
     """
-    Simpan keputusan realtime ke CSV
+    Simpan keputusan realtime ke buffer; ditulis ke Parquet
+    (partisi date/region) per batch, lihat flush_realtime
     """
     df = decision_df.copy()
     df["region"] = region_name
     df["logged_at"] = datetime.utcnow()
+    df["date"] = df["logged_at"].dt.strftime("%Y-%m-%d")
+
+    with _realtime_lock:
+        buf = _realtime_buffer
+        buf["frames"].append(df)
+        buf["rows"] += len(df)
+        if buf["since"] is None:
+            buf["since"] = time.monotonic()
 
-    if CSV_LOG.exists():
-        df.to_csv(CSV_LOG, mode="a", header=False, index=False)
-    else:
-        df.to_csv(CSV_LOG, index=False)
+        due = (
+            flush
+            or buf["rows"] >= REALTIME_FLUSH_ROWS
+            or time.monotonic() - buf["since"] >= REALTIME_FLUSH_SECONDS
+        )
+
+    if due:
+        flush_realtime()
+
+
+def realtime_table(df):
+    """
+    DataFrame → pyarrow Table dengan REALTIME_SCHEMA
+    (kolom tambahan dibuang, kolom yang tidak ada diisi null)
+    """
+    columns = {}
+    for field in REALTIME_SCHEMA:
+        if field.name in df.columns:
+            values = df[field.name]
+            if pa.types.is_string(field.type):
+                values = values.astype(object).where(values.notna(), None)
+            columns[field.name] = pa.array(values, type=field.type, from_pandas=True)
+        else:
+            columns[field.name] = pa.nulls(len(df), type=field.type)
+    return pa.Table.from_pydict(columns, schema=REALTIME_SCHEMA)
+
+
+def flush_realtime():
+    """
+    Tulis seluruh buffer realtime sebagai satu batch Parquet
+    Output: jumlah baris yang ditulis
+    """
+    with _realtime_lock:
+        frames = _realtime_buffer["frames"]
+        _realtime_buffer.update({"frames": [], "rows": 0, "since": None})
+
+    if not frames:
+        return 0
+
+    df = pd.concat(frames, ignore_index=True)
+    table = realtime_table(df)
+
+    pads.write_dataset(
+        table,
+        REALTIME_DIR,
+        format="parquet",
+        partitioning=REALTIME_PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    return len(df)
+
+
+atexit.register(flush_realtime)
+
+
+def read_realtime_log(
+    start=None, end=None, region=None, level=None, columns=None, wilayah=None
+):
+    """
+    Baca log realtime dengan pruning partisi & kolom
+    start, end : datetime / string (UTC), dibandingkan dengan logged_at
+    region     : string atau list region_name saat log_realtime
+                 (partisi, mis. "Jawa Timur")
+    level      : string atau list level (mis. "AWAS")
+    columns    : list kolom yang dibaca (None = semua)
+    wilayah    : string atau list kolom wilayah (kecamatan/kabupaten);
+                 filter didorong ke scan Parquet (statistik row group)
+    Contoh: read_realtime_log("2026-01-01", "2026-01-07",
+                              level="AWAS", wilayah="Gresik")
+    """
+    if not REALTIME_DIR.exists():
+        return pd.DataFrame(columns=columns)
+
+    dataset = pads.dataset(
+        REALTIME_DIR,
+        schema=REALTIME_SCHEMA,
+        format="parquet",
+        partitioning=REALTIME_PARTITIONING,
+    )
+
+    expr = None
+
+    def _and(cond):
+        return cond if expr is None else expr & cond
+
+    if start is not None:
+        start = pd.Timestamp(start)
+        expr = _and(pads.field("date") >= start.strftime("%Y-%m-%d"))
+        expr = _and(pads.field("logged_at") >= start.to_datetime64())
+    if end is not None:
+        end = pd.Timestamp(end)
+        expr = _and(pads.field("date") <= end.strftime("%Y-%m-%d"))
+        expr = _and(pads.field("logged_at") <= end.to_datetime64())
+    if region is not None:
+        region = [region] if isinstance(region, str) else list(region)
+        expr = _and(pads.field("region").isin(region))
+    if level is not None:
+        level = [level] if isinstance(level, str) else list(level)
+        expr = _and(pads.field("level").isin(level))
+    if wilayah is not None:
+        wilayah = [wilayah] if isinstance(wilayah, str) else list(wilayah)
+        expr = _and(pads.field("wilayah").isin(wilayah))
+
+    table = dataset.to_table(columns=columns, filter=expr)
+    return table.to_pandas()
+
+
+def migrate_csv_log():
+    """
+    Pindahkan realtime_log.csv lama ke log Parquet terpartisi
+    """
+    if not CSV_LOG.exists():
+        return 0
+
+    n_rows = 0
+    for df in pd.read_csv(CSV_LOG, parse_dates=["logged_at"], chunksize=100_000):
+        df["date"] = df["logged_at"].dt.strftime("%Y-%m-%d")
+        with _realtime_lock:
+            _realtime_buffer["frames"].append(df)
+        n_rows += flush_realtime()
+
+    CSV_LOG.rename(CSV_LOG.with_suffix(".csv.migrated"))
+    return n_rows
 
 
 # ==========================================================
-# 2️⃣ LOG KEJADIAN SIGNIFIKAN (JSON)
+# 2️⃣ LOG KEJADIAN SIGNIFIKAN (JSON LINES, APPEND-ONLY)
 # ==========================================================
-def log_event(narrative, status, region_name):
+def event_segment_path(day, max_bytes=EVENT_MAX_BYTES):
+    """
+    Segmen aktif untuk satu hari: events/events_YYYYMMDD_NNN.jsonl
+    Segmen baru dibuat tiap hari atau bila ukuran > max_bytes
+    """
+    existing = sorted(EVENT_DIR.glob(f"events_{day}_*.jsonl"))
+    seq = 0
+
+    if existing:
+        last = existing[-1]
+        if max_bytes is None or last.stat().st_size < max_bytes:
+            return last
+        seq = int(last.stem.rsplit("_", 1)[1]) + 1
+
+    return EVENT_DIR / f"events_{day}_{seq:03d}.jsonl"
+
+
+def repair_torn_tail(path, block_size=4096):
+    """
+    Buang baris terakhir yang terpotong (crash saat tulis) agar
+    event berikutnya tidak tersambung ke baris rusak
+    Output: jumlah byte yang dibuang
+    """
+    if not path.exists():
+        return 0
+
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return 0
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return 0
+
+        # mundur per blok sampai newline terakhir
+        pos = size
+        keep = 0
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            i = f.read(step).rfind(b"\n")
+            if i >= 0:
+                keep = pos + i + 1
+                break
+
+        f.truncate(keep)
+        return size - keep
+
+
+def append_event(event, fsync=FSYNC_POLICY, max_bytes=EVENT_MAX_BYTES):
+    """
+    Tambah satu event (O(1)), satu baris JSON per event
+    fsync: "always" | "interval" | "never"
+    """
+    day = event["time_utc"][:10].replace("-", "")
+    line = json.dumps(event, ensure_ascii=False) + "\n"
+
+    with _event_lock:
+        EVENT_DIR.mkdir(exist_ok=True)
+        path = event_segment_path(day, max_bytes)
+        repair_torn_tail(path)
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+
+            now = time.monotonic()
+            if fsync == "always" or (
+                fsync == "interval"
+                and now - _event_state["last_fsync"] >= FSYNC_INTERVAL
+            ):
+                os.fsync(f.fileno())
+                _event_state["last_fsync"] = now
+
+    return path
+
+
+def log_event(narrative, status, region_name, fsync=FSYNC_POLICY):
     """
     Simpan event penting (WASPADA / PERINGATAN)
     """
@@ -51,13 +324,281 @@ def log_event(narrative, status, region_name):
         "narrative": narrative
     }
 
-    if JSON_LOG.exists():
-        with open(JSON_LOG, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    else:
-        data = []
+    append_event(event, fsync=fsync)
+
+
+# ==========================================================
+# 3️⃣ QUERY EVENT (TANPA LOAD SELURUH RIWAYAT)
+# ==========================================================
+def query_events(start=None, end=None, region=None, status=None):
+    """
+    Iterasi event sesuai rentang waktu / wilayah / status
+    Segmen di luar rentang hari dilewati tanpa dibaca
+    start, end : datetime atau string ISO (UTC)
+    status     : string atau list status
+    """
+    if isinstance(start, str):
+        start = datetime.fromisoformat(start)
+    if isinstance(end, str):
+        end = datetime.fromisoformat(end)
+    if isinstance(status, str):
+        status = [status]
 
-    data.append(event)
+    day_min = start.strftime("%Y%m%d") if start else None
+    day_max = end.strftime("%Y%m%d") if end else None
 
-    with open(JSON_LOG, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    for path in sorted(EVENT_DIR.glob("events_*_*.jsonl")):
+        day = path.stem.split("_")[1]
+        if (day_min and day < day_min) or (day_max and day > day_max):
+            continue
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # baris terakhir terpotong (crash saat tulis)
+                    continue
+
+                if region and event.get("region") != region:
+                    continue
+                if status and event.get("status") not in status:
+                    continue
+
+                if start or end:
+                    t = datetime.fromisoformat(event["time_utc"])
+                    if (start and t < start) or (end and t > end):
+                        continue
+
+                yield event
+
+
+def migrate_json_log():
+    """
+    Pindahkan event_log.json lama ke event store JSON Lines
+    """
+    if not JSON_LOG.exists():
+        return 0
+
+    with open(JSON_LOG, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    for event in data:
+        append_event(event, fsync="never")
+
+    JSON_LOG.rename(JSON_LOG.with_suffix(".json.migrated"))
+    return len(data)
+
+
+# ==========================================================
+# 4️⃣ LOGGER APLIKASI (NON-BLOCKING)
+# ==========================================================
+def setup_logger(name="puting_beliung", level=logging.INFO):
+    """
+    Logger aplikasi: record masuk QueueHandler, lalu ditulis
+    ke logs/app.log oleh QueueListener di thread terpisah
+    Aman dipanggil ulang (rerun Streamlit)
+    """
+    if name in _app_loggers:
+        return _app_loggers[name]
+
+    log_queue = queue.Queue(maxsize=QUEUE_MAXSIZE * 10)
+
+    file_handler = logging.FileHandler(APP_LOG, encoding="utf-8")
+    file_handler.setFormatter(
+        logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s")
+    )
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.propagate = False
+
+    _app_loggers[name] = logger
+    return logger
+
+
+# ==========================================================
+# 5️⃣ PENULIS LOG LATAR BELAKANG (ANTREAN TERBATAS)
+# ==========================================================
+class BackgroundWriter:
+    """
+    Antrean terbatas + thread penulis untuk log_realtime / log_event
+    Pemanggil tidak pernah menunggu disk:
+    - drop_oldest : buang item tertua saat antrean penuh
+    - drop_newest : buang item baru saat antrean penuh
+    - block       : tunggu maksimal block_timeout, lalu buang
+    """
+
+    def __init__(
+        self,
+        maxsize=QUEUE_MAXSIZE,
+        policy=QUEUE_POLICY,
+        batch_size=QUEUE_BATCH_SIZE,
+        flush_interval=QUEUE_FLUSH_INTERVAL,
+        block_timeout=0.5,
+    ):
+        if policy not in ("drop_oldest", "drop_newest", "block"):
+            raise ValueError(f"Policy antrean {policy} tidak dikenal")
+
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "written": 0,
+            "dropped": 0,
+            "errors": 0,
+            "batches": 0,
+            "last_flush_latency": 0.0,
+            "max_flush_latency": 0.0,
+        }
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="pb-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def submit(self, kind, *args, **kwargs):
+        """
+        Masukkan tugas tulis ("realtime" / "event") ke antrean
+        Output: True bila diterima, False bila dibuang
+        """
+        item = (kind, args, kwargs)
+        self._count("submitted")
+
+        try:
+            if self.policy == "block":
+                self.queue.put(item, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        if self.policy == "drop_oldest":
+            try:
+                self.queue.get_nowait()
+                self._count("dropped")
+                self.queue.put_nowait(item)
+                return True
+            except (queue.Empty, queue.Full):
+                pass
+
+        self._count("dropped")
+        return False
+
+    def _run(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                if realtime_flush_due():
+                    flush_realtime()
+                continue
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        start = time.perf_counter()
+
+        for kind, args, kwargs in batch:
+            try:
+                if kind == "realtime":
+                    log_realtime(*args, **kwargs)
+                elif kind == "event":
+                    log_event(*args, **kwargs)
+                else:
+                    raise ValueError(f"Jenis log {kind} tidak dikenal")
+                self._count("written")
+            except Exception:
+                self._count("errors")
+
+        latency = time.perf_counter() - start
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["last_flush_latency"] = latency
+            self._stats["max_flush_latency"] = max(
+                self._stats["max_flush_latency"], latency
+            )
+
+    def metrics(self):
+        """
+        Kedalaman antrean, jumlah terbuang, latensi flush, dst.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self.queue.qsize()
+        stats["queue_maxsize"] = self.queue.maxsize
+        stats["policy"] = self.policy
+        return stats
+
+    def stop(self, timeout=5.0):
+        """
+        Hentikan thread setelah antrean habis, lalu flush buffer realtime
+        """
+        self._stop.set()
+        self._thread.join(timeout)
+        flush_realtime()
+
+
+def realtime_flush_due():
+    """
+    True bila buffer realtime sudah melewati REALTIME_FLUSH_SECONDS
+    """
+    since = _realtime_buffer["since"]
+    return since is not None and time.monotonic() - since >= REALTIME_FLUSH_SECONDS
+
+
+def get_background_writer():
+    """
+    Satu BackgroundWriter per proses (dibagi antar sesi dashboard)
+    """
+    with _writer_lock:
+        if _writer["instance"] is None:
+            writer = BackgroundWriter()
+            atexit.register(writer.stop)
+            _writer["instance"] = writer
+        return _writer["instance"]
+
+
+def log_realtime_async(decision_df, region_name):
+    """
+    Versi non-blocking log_realtime (lewat antrean latar belakang)
+    """
+    if decision_df is None or decision_df.empty:
+        return False
+    return get_background_writer().submit("realtime", decision_df, region_name)
+
+
+def log_event_async(narrative, status, region_name):
+    """
+    Versi non-blocking log_event (lewat antrean latar belakang)
+    """
+    if status == "NORMAL":
+        return False
+    return get_background_writer().submit("event", narrative, status, region_name)
+
+
+def writer_metrics():
+    """
+    Metrik penulis latar belakang (queue depth, flush latency, dropped)
+    """
+    return get_background_writer().metrics()
@@ -0,0 +1,370 @@
+# ==========================================================
+#  METRIK TAHAP PIPELINE (WAKTU, CPU, RSS, UKURAN DATA)
+#  Module : engine/metrics.py
+# ==========================================================
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import resource
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+METRICS_DIR = BASE_DIR / "logs" / "metrics"
+METRICS_FILE = METRICS_DIR / "metrics.json"
+SLOWEST_PROFILE = METRICS_DIR / "slowest_cycle.prof"
+
+METRICS_HISTORY = 100                  # siklus terakhir yang disimpan
+METRICS_PORT = 9108
+METRICS_PREFIX = "puting_beliung"
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_lock = threading.Lock()
+_local = threading.local()
+_state = {
+    "stages": {},                      # akumulasi per tahap (semua siklus)
+    "cycles": deque(maxlen=METRICS_HISTORY),
+    "slowest": None,                   # ringkasan siklus terlama
+}
+
+
+# ======================
+# UKURAN MEMORI & DATA
+# ======================
+def current_rss():
+    """
+    RSS proses saat ini (byte), dari /proc bila tersedia
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss()
+
+
+def peak_rss():
+    """
+    Puncak RSS (byte): VmHWM Linux, fallback ru_maxrss
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+
+
+def reset_peak_rss():
+    """
+    Reset VmHWM (Linux >= 4.0) agar puncak terukur per tahap
+    Output: True bila berhasil
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def data_nbytes(obj):
+    """
+    Perkiraan ukuran data (byte) tanpa memuat data lazy:
+    xarray/numpy (.nbytes), DataFrame, dict/list (jumlah isi),
+    path (ukuran file)
+    """
+    if obj is None:
+        return 0
+    if isinstance(obj, (str, Path)):
+        try:
+            return os.path.getsize(obj)
+        except OSError:
+            return 0
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        return int(obj.memory_usage(index=True).sum())
+    if hasattr(obj, "nbytes"):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(data_nbytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(data_nbytes(v) for v in obj)
+    return 0
+
+
+# ======================
+# PENCATAT TAHAP
+# ======================
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+def _accumulate(record):
+    with _lock:
+        agg = _state["stages"].setdefault(record["stage"], {
+            "count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+            "max_wall_seconds": 0.0, "peak_rss_bytes": 0,
+            "last_input_bytes": 0, "last_output_bytes": 0, "errors": 0,
+        })
+        agg["count"] += 1
+        agg["wall_seconds"] += record["wall_seconds"]
+        agg["cpu_seconds"] += record["cpu_seconds"]
+        agg["max_wall_seconds"] = max(agg["max_wall_seconds"], record["wall_seconds"])
+        agg["peak_rss_bytes"] = max(agg["peak_rss_bytes"], record["peak_rss_bytes"])
+        agg["last_input_bytes"] = record["input_bytes"]
+        agg["last_output_bytes"] = record["output_bytes"]
+        agg["errors"] += int(record["error"] is not None)
+
+    cycle = getattr(_local, "cycle", None)
+    if cycle is not None:
+        cycle["stages"].append(record)
+
+
+@contextmanager
+def stage(name, inputs=None):
+    """
+    Ukur satu tahap: wall time, CPU time (proses), puncak RSS,
+    ukuran input/output (isi record["output_bytes"] bila perlu)
+    Output (yield): dict record tahap
+    """
+    record = {
+        "stage": name,
+        "input_bytes": data_nbytes(inputs),
+        "output_bytes": 0,
+        "error": None,
+    }
+    stack = _stack()
+    # reset VmHWM hanya di tahap terluar, agar puncak tahap induk tidak hilang
+    if not stack:
+        reset_peak_rss()
+    stack.append(record)
+
+    rss_start = current_rss()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["wall_seconds"] = time.perf_counter() - wall_start
+        record["cpu_seconds"] = time.process_time() - cpu_start
+        record["rss_start_bytes"] = rss_start
+        record["peak_rss_bytes"] = max(peak_rss(), current_rss())
+        stack.pop()
+        _accumulate(record)
+
+
+def instrumented(name):
+    """
+    Decorator: jalankan fungsi di dalam stage(name)
+    Ukuran input = argumen, ukuran output = nilai kembalian
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, inputs=list(args) + list(kwargs.values())) as record:
+                result = func(*args, **kwargs)
+                record["output_bytes"] = data_nbytes(result)
+            return result
+        return wrapper
+    return decorator
+
+
+# ======================
+# SIKLUS + PROFIL SIKLUS TERLAMA
+# ======================
+@contextmanager
+def cycle(label, profile=False, write=True):
+    """
+    Kelompokkan tahap-tahap satu siklus pipeline
+    profile: rekam cProfile; disimpan bila siklus ini terlama sejauh ini
+    write  : tulis METRICS_FILE setelah siklus selesai
+    Output (yield): dict record siklus
+    """
+    record = {"cycle": str(label), "started": time.time(), "stages": [], "error": None}
+    _local.cycle = record
+
+    profiler = None
+    if profile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:             # profiler lain sedang aktif
+            profiler = None
+
+    wall_start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record["wall_seconds"] = time.perf_counter() - wall_start
+        if profiler is not None:
+            profiler.disable()
+        _local.cycle = None
+        _finish_cycle(record, profiler)
+        if write:
+            write_metrics()
+
+
+def _finish_cycle(record, profiler=None):
+    with _lock:
+        _state["cycles"].append(record)
+        slowest = _state["slowest"]
+        is_slowest = slowest is None or record["wall_seconds"] > slowest["wall_seconds"]
+        if is_slowest:
+            _state["slowest"] = {
+                "cycle": record["cycle"],
+                "wall_seconds": record["wall_seconds"],
+                "profile": None,
+            }
+
+    if is_slowest and profiler is not None:
+        profile_path = str(dump_profile(profiler))
+        with _lock:
+            if _state["slowest"]["cycle"] == record["cycle"]:
+                _state["slowest"]["profile"] = profile_path
+
+
+def dump_profile(profiler, path=SLOWEST_PROFILE, top=30):
+    """
+    Simpan profil (.prof) + ringkasan teks cumulative (.txt)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+    path.with_suffix(".txt").write_text(text.getvalue(), encoding="utf-8")
+    return path
+
+
+# ======================
+# EKSPOR: JSON & PROMETHEUS
+# ======================
+def snapshot():
+    """
+    Salinan metrik: akumulasi per tahap, siklus terakhir, siklus terlama
+    """
+    with _lock:
+        return {
+            "updated": time.time(),
+            "stages": {k: dict(v) for k, v in _state["stages"].items()},
+            "cycles": list(_state["cycles"]),
+            "slowest": dict(_state["slowest"]) if _state["slowest"] else None,
+        }
+
+
+def write_metrics(path=METRICS_FILE):
+    """
+    Tulis snapshot ke JSON (atomic replace)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    tmp_path.replace(path)
+    return path
+
+
+def render_prometheus(prefix=METRICS_PREFIX):
+    """
+    Metrik dalam format teks Prometheus (exposition 0.0.4)
+    """
+    snap = snapshot()
+    series = [
+        ("stage_calls_total", "counter", "Jumlah eksekusi tahap", "count"),
+        ("stage_errors_total", "counter", "Jumlah tahap gagal", "errors"),
+        ("stage_wall_seconds_total", "counter", "Akumulasi wall time tahap", "wall_seconds"),
+        ("stage_cpu_seconds_total", "counter", "Akumulasi CPU time proses selama tahap", "cpu_seconds"),
+        ("stage_max_wall_seconds", "gauge", "Wall time tahap terlama", "max_wall_seconds"),
+        ("stage_peak_rss_bytes", "gauge", "Puncak RSS selama tahap", "peak_rss_bytes"),
+        ("stage_input_bytes", "gauge", "Ukuran input tahap terakhir", "last_input_bytes"),
+        ("stage_output_bytes", "gauge", "Ukuran output tahap terakhir", "last_output_bytes"),
+    ]
+
+    lines = []
+    for metric, kind, help_text, key in series:
+        name = f"{prefix}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stage_name, agg in sorted(snap["stages"].items()):
+            lines.append(f'{name}{{stage="{stage_name}"}} {agg[key]}')
+
+    if snap["cycles"]:
+        last = snap["cycles"][-1]
+        name = f"{prefix}_cycle_wall_seconds"
+        lines += [
+            f"# HELP {name} Wall time siklus terakhir",
+            f"# TYPE {name} gauge",
+            f"{name} {last['wall_seconds']}",
+        ]
+    if snap["slowest"]:
+        name = f"{prefix}_slowest_cycle_wall_seconds"
+        lines += [
+            f"# HELP {name} Wall time siklus terlama",
+            f"# TYPE {name} gauge",
+            f"{name} {snap['slowest']['wall_seconds']}",
+        ]
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") in ("", "/metrics"):
+            body = render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif self.path == "/metrics.json":
+            body = json.dumps(snapshot()).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    """
+    Endpoint lokal /metrics (Prometheus) & /metrics.json di thread daemon
+    Output: objek server (panggil .shutdown() untuk berhenti)
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, name="pb-metrics", daemon=True
+    )
+    thread.start()
+    return server
+
+
+def reset_metrics():
+    with _lock:
+        _state["stages"].clear()
+        _state["cycles"].clear()
+        _state["slowest"] = None
@@ -4,9 +4,93 @@
 # Versi: BMKG Operasional
 # ==========================================================
 
+import time
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
 import numpy as np
 import xarray as xr
 
+from engine.dtypes import FIELD_DTYPE, apply_dtype_policy
+from engine.metrics import instrumented
+
+# ==========================================================
+# PARAMETER QC & SMOOTHING
+# ==========================================================
+QC_RANGES = {
+    "BT_IR": (180, 330),   # Brightness Temperature IR (K)
+    "RCR": (-20, 5),       # Rapid Cooling Rate (K/10min)
+}
+
+RH_RANGE = (0, 100)        # RH NWP (%)
+
+SMOOTH_WINDOW = 3          # timestep
+FILL_METHOD = "linear"     # interpolasi waktu
+
+
+def preprocess_params():
+    """
+    Parameter yang menentukan hasil preprocessing
+    (dibaca saat dipanggil; dipakai sebagai bagian kunci cache)
+    """
+    return {
+        "qc_ranges": {k: list(v) for k, v in QC_RANGES.items()},
+        "rh_range": list(RH_RANGE),
+        "window": SMOOTH_WINDOW,
+        "fill_method": FILL_METHOD,
+        "dtype": np.dtype(FIELD_DTYPE).name,
+    }
+
+
+# ==========================================================
+# UTIL PARALEL & TIMING
+# ==========================================================
+@contextmanager
+def timed(timings, name):
+    """
+    Catat durasi (detik) satu tahap ke dict timings (jika ada)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def split_workers(workers, n_sources):
+    """
+    Bagi satu anggaran worker ke dua level:
+    (worker antar sumber, worker antar variabel per sumber),
+    sehingga total thread <= workers
+    """
+    outer = max(1, min(workers, n_sources))
+    return outer, max(1, workers // outer)
+
+
+def map_time_vars(func, ds, workers=1, pool=None):
+    """
+    Terapkan func ke tiap variabel berdimensi time (urutan hasil tetap)
+    pool   : executor bersama (thread/process); func harus picklable
+             untuk process pool (fungsi top-level / partial)
+    workers: tanpa pool, > 1 → thread pool lokal
+    """
+    names = [var for var in ds.data_vars if "time" in ds[var].dims]
+    arrays = [ds[var] for var in names]
+
+    if pool is not None and len(names) > 1:
+        results = list(pool.map(func, arrays))
+    elif workers > 1 and len(names) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as local_pool:
+            results = list(local_pool.map(func, arrays))
+    else:
+        results = [func(da) for da in arrays]
+
+    for var, da in zip(names, results):
+        ds[var] = da
+    return ds
+
 # ==========================================================
 # 1️⃣ QUALITY CONTROL DASAR
 # ==========================================================
@@ -31,52 +115,65 @@ def qc_range(ds, var_name, vmin=None, vmax=None):
 # ==========================================================
 # 2️⃣ FILL MISSING VALUE
 # ==========================================================
-def fill_missing(ds, method="linear"):
+def _interpolate_time(da, method=FILL_METHOD):
+    return da.interpolate_na(dim="time", method=method, fill_value="extrapolate")
+
+
+def fill_missing(ds, method=FILL_METHOD, workers=1, pool=None):
     """
     Mengisi data hilang (time-based)
+    workers > 1 / pool: variabel diproses paralel
     """
-    for var in ds.data_vars:
-        if "time" in ds[var].dims:
-            ds[var] = ds[var].interpolate_na(
-                dim="time", method=method, fill_value="extrapolate"
-            )
-    return ds
+    return map_time_vars(
+        partial(_interpolate_time, method=method), ds, workers, pool
+    )
 
 
 # ==========================================================
 # 3️⃣ TEMPORAL SMOOTHING
 # ==========================================================
-def smooth_time(ds, window=3):
+def _rolling_mean(da, window=3):
+    return da.rolling(time=window, center=True, min_periods=1).mean()
+
+
+def smooth_time(ds, window=3, workers=1, pool=None):
     """
     Smoothing temporal (rolling mean)
     window: jumlah timestep
+    workers > 1 / pool: variabel diproses paralel
     """
-    for var in ds.data_vars:
-        if "time" in ds[var].dims:
-            ds[var] = ds[var].rolling(
-                time=window, center=True, min_periods=1
-            ).mean()
-    return ds
+    return map_time_vars(partial(_rolling_mean, window=window), ds, workers, pool)
 
 
 # ==========================================================
 # 4️⃣ STANDARISASI DATA SATELIT
 # ==========================================================
-def preprocess_satellite(ds):
+def qc_satellite(ds):
     """
-    Pipeline preprocessing data satelit
+    QC batas fisik variabel satelit (QC_RANGES)
     """
-    # QC Brightness Temperature IR
-    if "BT_IR" in ds:
-        ds = qc_range(ds, "BT_IR", vmin=180, vmax=330)
+    for var, (vmin, vmax) in QC_RANGES.items():
+        if var in ds:
+            ds = qc_range(ds, var, vmin=vmin, vmax=vmax)
+    return ds
 
-    # QC Rapid Cooling Rate
-    if "RCR" in ds:
-        ds = qc_range(ds, "RCR", vmin=-20, vmax=5)
 
-    ds = fill_missing(ds)
-    ds = smooth_time(ds, window=3)
+def preprocess_satellite(ds, workers=1, timings=None, pool=None):
+    """
+    Pipeline preprocessing data satelit
+    timings: dict opsional, diisi durasi tiap tahap (detik)
+    pool   : executor bersama untuk pekerjaan per variabel
+    """
+    # QC Brightness Temperature IR & Rapid Cooling Rate
+    with timed(timings, "qc"):
+        ds = qc_satellite(ds)
 
+    with timed(timings, "fill_missing"):
+        ds = fill_missing(ds, method=FILL_METHOD, workers=workers, pool=pool)
+    with timed(timings, "smooth_time"):
+        ds = smooth_time(ds, window=SMOOTH_WINDOW, workers=workers, pool=pool)
+
+    ds = apply_dtype_policy(ds)
     ds.attrs["preprocess"] = "BMKG Satellite Preprocessing"
     return ds
 
@@ -84,18 +181,31 @@ def preprocess_satellite(ds):
 # ==========================================================
 # 5️⃣ STANDARISASI DATA NWP
 # ==========================================================
-def preprocess_nwp(ds):
+def qc_nwp(ds):
     """
-    Preprocessing NWP (RH, angin, dsb)
+    QC NWP: RH harus 0-100%
     """
-    # RH harus 0-100%
-    for var in ds.data_vars:
+    for var in list(ds.data_vars):
         if "rh" in var.lower():
-            ds = qc_range(ds, var, vmin=0, vmax=100)
+            ds = qc_range(ds, var, vmin=RH_RANGE[0], vmax=RH_RANGE[1])
+    return ds
 
-    ds = fill_missing(ds)
-    ds = smooth_time(ds, window=3)
 
+def preprocess_nwp(ds, workers=1, timings=None, pool=None):
+    """
+    Preprocessing NWP (RH, angin, dsb)
+    timings: dict opsional, diisi durasi tiap tahap (detik)
+    pool   : executor bersama untuk pekerjaan per variabel
+    """
+    with timed(timings, "qc"):
+        ds = qc_nwp(ds)
+
+    with timed(timings, "fill_missing"):
+        ds = fill_missing(ds, method=FILL_METHOD, workers=workers, pool=pool)
+    with timed(timings, "smooth_time"):
+        ds = smooth_time(ds, window=SMOOTH_WINDOW, workers=workers, pool=pool)
+
+    ds = apply_dtype_policy(ds)
     ds.attrs["preprocess"] = "BMKG NWP Preprocessing"
     return ds
 
@@ -103,26 +213,205 @@ def preprocess_nwp(ds):
 # ==========================================================
 # 6️⃣ PIPELINE TERPADU
 # ==========================================================
-def preprocess_all(data_dict):
+PREPROCESSORS = {
+    "satellite": preprocess_satellite,
+    "nwp": preprocess_nwp,
+}
+
+
+def preprocess_source(key, data, workers=1, pool=None):
+    """
+    Preprocessing satu sumber data
+    Output: (data, timings per tahap)
+    """
+    timings = {}
+    with timed(timings, "total"):
+        if isinstance(data, xr.Dataset) and key in PREPROCESSORS:
+            data = PREPROCESSORS[key](
+                data, workers=workers, timings=timings, pool=pool
+            )
+    return data, timings
+
+
+@instrumented("preprocess_all")
+def preprocess_all(data_dict, workers=1, executor="thread", timings=None):
     """
     data_dict dari reader.load_event_data()
+    workers : anggaran worker total (1 = sekuensial)
+    executor: "thread" → anggaran dibagi antar sumber × antar variabel
+              (split_workers); "process" → satu process pool bersama
+              berisi `workers` proses untuk pekerjaan per variabel,
+              sumber hanya diorkestrasi dari thread di proses induk
+    timings : dict opsional, diisi {sumber: {tahap: detik}}
     """
-    output = {}
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Executor {executor} tidak dikenal")
+
+    if executor == "process" and workers > 1:
+        outer, inner = len(data_dict), 1
+        shared = ProcessPoolExecutor(max_workers=workers)
+    else:
+        outer, inner = split_workers(workers, len(data_dict))
+        shared = nullcontext()
 
-    for key, data in data_dict.items():
-        if isinstance(data, xr.Dataset):
-            if key == "satellite":
-                output[key] = preprocess_satellite(data)
-            elif key == "nwp":
-                output[key] = preprocess_nwp(data)
-            else:
-                output[key] = data
+    with shared as var_pool:
+        if outer > 1:
+            with ThreadPoolExecutor(max_workers=outer) as pool:
+                futures = {
+                    key: pool.submit(preprocess_source, key, data, inner, var_pool)
+                    for key, data in data_dict.items()
+                }
+                results = {key: future.result() for key, future in futures.items()}
         else:
-            output[key] = data
+            results = {
+                key: preprocess_source(key, data, inner, var_pool)
+                for key, data in data_dict.items()
+            }
+
+    output = {}
+    for key, (data, source_timings) in results.items():
+        output[key] = data
+        if timings is not None:
+            timings[key] = source_timings
 
     return output
 
 
+# ==========================================================
+# 7️⃣ PREPROCESSING STREAMING (PER POTONGAN WAKTU)
+# ==========================================================
+QC_FUNCS = {
+    "satellite": qc_satellite,
+    "nwp": qc_nwp,
+}
+
+
+def valid_extent(ds, qc, block_size=6):
+    """
+    Satu lintasan awal (per blok waktu) setelah QC: per piksel
+    jumlah titik valid, dua indeks valid pertama & dua terakhir
+    Output: {var: (n_valid, first, second, last, second_last)}
+    """
+    n_time = ds.sizes["time"]
+    extent = {}
+
+    for t0 in range(0, n_time, block_size):
+        block = qc(ds.isel(time=slice(t0, t0 + block_size)).load())
+
+        for var in block.data_vars:
+            da = block[var]
+            if "time" not in da.dims:
+                continue
+
+            valid = np.moveaxis(da.notnull().values, da.get_axis_num("time"), 0)
+            if var not in extent:
+                shape = valid.shape[1:]
+                extent[var] = (
+                    np.zeros(shape, dtype=np.int64),
+                    np.full(shape, n_time), np.full(shape, n_time),
+                    np.full(shape, -1), np.full(shape, -1),
+                )
+            n_valid, first, second, last, second_last = extent[var]
+
+            for i, mask in enumerate(valid):
+                t = t0 + i
+                second[mask & (n_valid == 1)] = t
+                first[mask & (n_valid == 0)] = t
+                n_valid += mask
+                second_last[mask] = last[mask]
+                last[mask] = t
+
+    return extent
+
+
+def _fill_is_exact(win, a, b, lo, hi, extent):
+    """
+    Cek apakah interpolasi di jendela [a, b) identik dengan batch
+    untuk rentang [lo, hi), per piksel:
+    - ada titik valid sebelum lo → jendela harus memuat titik valid <= lo
+      (selain itu ekstrapolasi kiri butuh 2 titik valid pertama)
+    - ada titik valid setelah hi-1 → jendela memuat titik valid >= hi-1
+      (selain itu ekstrapolasi kanan butuh 2 titik valid terakhir)
+    - piksel dengan < 2 titik valid di seluruh deret dibiarkan batch
+    """
+    r0, r1 = lo - a, hi - a
+
+    for var in win.data_vars:
+        da = win[var]
+        if "time" not in da.dims:
+            continue
+
+        n_valid, first, second, last, second_last = extent[var]
+        valid = np.moveaxis(da.notnull().values, da.get_axis_num("time"), 0)
+
+        left_ok = np.where(first < lo, valid[:r0 + 1].any(axis=0), second < b)
+        right_ok = np.where(last > hi - 1, valid[r1 - 1:].any(axis=0), second_last >= a)
+
+        if not np.all((left_ok & right_ok) | (n_valid < 2)):
+            return False
+
+    return True
+
+
+def iter_preprocess_chunks(
+    ds, kind="satellite", chunk_size=6, window=SMOOTH_WINDOW, method=FILL_METHOD
+):
+    """
+    Preprocessing per potongan waktu (generator)
+    Tiap potongan dibaca dengan halo window//2 untuk rolling mean;
+    halo interpolasi diperlebar sampai tetangga valid (dari valid_extent)
+    termuat, sehingga hasil sama dengan preprocess_satellite / preprocess_nwp
+    """
+    if kind not in QC_FUNCS:
+        raise ValueError(f"Jenis data {kind} tidak dikenal")
+
+    qc = QC_FUNCS[kind]
+    n_time = ds.sizes["time"]
+    halo = window // 2
+    extent = valid_extent(ds, qc, block_size=chunk_size)
+
+    for c0 in range(0, n_time, chunk_size):
+        c1 = min(c0 + chunk_size, n_time)
+
+        # rentang yang harus terisi tepat sebelum smoothing
+        lo, hi = max(c0 - halo, 0), min(c1 + halo, n_time)
+        a, b = lo, hi
+
+        while True:
+            win = qc(ds.isel(time=slice(a, b)).load())
+            if _fill_is_exact(win, a, b, lo, hi, extent):
+                break
+            step = b - a
+            a, b = max(a - step, 0), min(b + step, n_time)
+
+        win = fill_missing(win, method=method)
+        win = smooth_time(win, window=window)
+
+        chunk = apply_dtype_policy(win.isel(time=slice(c0 - a, c1 - a)))
+        chunk.attrs["preprocess"] = f"BMKG {kind.upper()} Streaming Preprocessing"
+        yield chunk
+
+
+def preprocess_streaming(
+    ds, kind="satellite", chunk_size=6, window=SMOOTH_WINDOW, sink=None
+):
+    """
+    Preprocessing hemat memori untuk reprocessing satu musim
+    sink: callable(chunk) untuk menulis tiap potongan (mis. ke disk);
+    tanpa sink, potongan digabung menjadi satu Dataset
+    """
+    chunks = iter_preprocess_chunks(
+        ds, kind=kind, chunk_size=chunk_size, window=window
+    )
+
+    if sink is not None:
+        for chunk in chunks:
+            sink(chunk)
+        return None
+
+    return xr.concat(list(chunks), dim="time")
+
+
 # ==========================================================
 # MAIN TEST
 # ==========================================================
@@ -5,6 +5,9 @@
 # ==========================================================
 
 import os
+import glob
+import json
+from functools import partial
 from pathlib import Path
 from datetime import datetime, timedelta
 
@@ -13,6 +16,9 @@ import pandas as pd
 import xarray as xr
 import yaml
 
+from engine.dtypes import apply_dtype_policy
+from engine.metrics import instrumented
+
 # ==========================================================
 # PATH DASAR
 # ==========================================================
@@ -20,6 +26,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 CONFIG_DIR = BASE_DIR / "config"
 
+# ==========================================================
+# CHUNKING DEFAULT (MODE LAZY / DASK)
+# ==========================================================
+DEFAULT_CHUNKS = {"time": 1, "lat": 512, "lon": 512}
+
 # ==========================================================
 # UTIL DASAR
 # ==========================================================
@@ -46,17 +57,19 @@ def normalize_time(dt, tz="UTC"):
 # ==========================================================
 # 1️⃣ READER DATA CONTOH (MOCK / DEV)
 # ==========================================================
-def read_sample_data():
+def read_sample_data(n_lat=20, n_lon=20, n_time=6, seed=None):
     """
     Data contoh untuk pengembangan awal
-    Output: xarray.Dataset
+    n_lat, n_lon, n_time: ukuran grid (untuk benchmark skala besar)
+    Output: xarray.Dataset (float32, lihat engine.dtypes)
     """
-    time = pd.date_range("2026-01-01 00:00", periods=6, freq="10min")
-    lat = np.linspace(-8.5, -7.0, 20)
-    lon = np.linspace(112.0, 113.5, 20)
+    time = pd.date_range("2026-01-01 00:00", periods=n_time, freq="10min")
+    lat = np.linspace(-8.5, -7.0, n_lat)
+    lon = np.linspace(112.0, 113.5, n_lon)
 
-    bt = 290 - 40 * np.random.rand(len(time), len(lat), len(lon))
-    rcr = -5 * np.random.rand(len(time), len(lat), len(lon))
+    rng = np.random if seed is None else np.random.RandomState(seed)
+    bt = 290 - 40 * rng.rand(len(time), len(lat), len(lon))
+    rcr = -5 * rng.rand(len(time), len(lat), len(lon))
 
     ds = xr.Dataset(
         {
@@ -73,24 +86,55 @@ def read_sample_data():
             "description": "Sample Himawari-like dataset",
         },
     )
-    return ds
+    return apply_dtype_policy(ds)
 
 
 # ==========================================================
 # 2️⃣ READER DATA SATELIT (HIMAWARI STYLE)
 # ==========================================================
-def read_satellite_nc(file_path: str):
+@instrumented("read_satellite")
+def read_satellite_nc(
+    file_path: str,
+    chunks=None,
+    region_bbox=None,
+    time_range=None,
+    max_bytes=None,
+):
     """
     Membaca data satelit NetCDF/HDF
     Output: xarray.Dataset
+
+    chunks      : None (eager) | dict ukuran chunk | "auto" → DEFAULT_CHUNKS
+    region_bbox : (lat_min, lat_max, lon_min, lon_max), dipotong sebelum load
+    time_range  : (start, end), dipotong sebelum load
+    max_bytes   : batas memori (lihat enforce_memory_limit)
     """
     file_path = Path(file_path)
     if not file_path.exists():
         raise FileNotFoundError(f"File satelit tidak ditemukan: {file_path}")
 
-    ds = xr.open_dataset(file_path)
+    ds = xr.open_dataset(file_path, chunks=resolve_chunks(chunks))
 
     # Standarisasi nama koordinat
+    ds = standardize_coords(ds)
+
+    # Pastikan time ada
+    if "time" not in ds.coords:
+        raise ValueError("Dataset satelit tidak memiliki koordinat time")
+
+    ds = pushdown_subset(ds, region_bbox, time_range)
+    ds = enforce_memory_limit(ds, max_bytes)
+    ds = record_selected_bytes(ds, file_path)
+    ds = lazy_dtype_policy(ds)
+
+    ds.attrs["reader"] = "BMKG Satellite Reader"
+    return ds
+
+
+def standardize_coords(ds):
+    """
+    Standarisasi nama koordinat latitude/longitude → lat/lon
+    """
     rename_map = {}
     if "latitude" in ds.coords:
         rename_map["latitude"] = "lat"
@@ -99,32 +143,42 @@ def read_satellite_nc(file_path: str):
 
     if rename_map:
         ds = ds.rename(rename_map)
-
-    # Pastikan time ada
-    if "time" not in ds.coords:
-        raise ValueError("Dataset satelit tidak memiliki koordinat time")
-
-    ds.attrs["reader"] = "BMKG Satellite Reader"
     return ds
 
 
 # ==========================================================
 # 3️⃣ READER DATA NWP (ERA5 / WRF / GSM)
 # ==========================================================
-def read_nwp_nc(file_path: str, level=None):
+def read_nwp_nc(
+    file_path: str,
+    level=None,
+    chunks=None,
+    region_bbox=None,
+    time_range=None,
+    max_bytes=None,
+):
     """
     Membaca data NWP (NetCDF)
     level: tekanan (hPa), misal 850, 700, 500
+    chunks / region_bbox / time_range / max_bytes: lihat read_satellite_nc
     """
     file_path = Path(file_path)
     if not file_path.exists():
         raise FileNotFoundError(f"File NWP tidak ditemukan: {file_path}")
 
-    ds = xr.open_dataset(file_path)
+    ds = xr.open_dataset(file_path, chunks=resolve_chunks(chunks))
+
+    # ERA5: latitude/longitude → lat/lon agar region_bbox bisa dipotong
+    ds = standardize_coords(ds)
 
     if level and "level" in ds.dims:
         ds = ds.sel(level=level)
 
+    ds = pushdown_subset(ds, region_bbox, time_range)
+    ds = enforce_memory_limit(ds, max_bytes)
+    ds = record_selected_bytes(ds, file_path)
+    ds = lazy_dtype_policy(ds)
+
     ds.attrs["reader"] = "BMKG NWP Reader"
     return ds
 
@@ -163,45 +217,312 @@ def read_observation_csv(file_path: str):
 def subset_by_region(ds, lat_min, lat_max, lon_min, lon_max):
     """
     Potong dataset berdasarkan bounding box wilayah
+    (mendukung lat menurun seperti ERA5)
     """
+    lat_slice = slice(lat_min, lat_max)
+    if ds.sizes.get("lat", 0) > 1 and ds["lat"][0] > ds["lat"][-1]:
+        lat_slice = slice(lat_max, lat_min)
+
     return ds.sel(
-        lat=slice(lat_min, lat_max),
+        lat=lat_slice,
         lon=slice(lon_min, lon_max),
     )
 
 
+def subset_by_time(ds, start=None, end=None):
+    """
+    Potong dataset berdasarkan jendela waktu
+    """
+    if start is not None:
+        start = normalize_time(start)
+    if end is not None:
+        end = normalize_time(end)
+    return ds.sel(time=slice(start, end))
+
+
+# ==========================================================
+# 6️⃣ PUSHDOWN SUBSET & BATAS MEMORI (MODE LAZY)
+# ==========================================================
+def resolve_chunks(chunks):
+    """
+    Normalisasi argumen chunks untuk xr.open_dataset
+    """
+    if chunks == "auto":
+        return dict(DEFAULT_CHUNKS)
+    return chunks
+
+
+def pushdown_subset(ds, region_bbox=None, time_range=None):
+    """
+    Potong bbox & waktu selagi dataset masih lazy,
+    sehingga hanya potongan ini yang dibaca dari disk
+    region_bbox tanpa dimensi lat/lon → ValueError
+    (jangan diam-diam mengembalikan seluruh domain)
+    """
+    if time_range and "time" in ds.dims:
+        ds = subset_by_time(ds, *time_range)
+
+    if region_bbox:
+        if "lat" not in ds.dims or "lon" not in ds.dims:
+            raise ValueError(
+                f"region_bbox butuh dimensi lat/lon, dataset berdimensi {tuple(ds.dims)}"
+            )
+        ds = subset_by_region(ds, *region_bbox)
+
+    return ds
+
+
+def max_chunk_bytes(ds):
+    """
+    Ukuran chunk terbesar (byte) di antara variabel dataset
+    """
+    largest = 0
+    for var in ds.data_vars.values():
+        if var.chunks is None:
+            n_bytes = var.nbytes
+        else:
+            n_bytes = var.dtype.itemsize * int(
+                np.prod([max(c) if c else 0 for c in var.chunks])
+            )
+        largest = max(largest, n_bytes)
+    return largest
+
+
+def enforce_memory_limit(ds, max_bytes=None):
+    """
+    Batas memori reader:
+    - eager : total potongan tidak boleh > max_bytes
+    - chunk : satu chunk terbesar tidak boleh > max_bytes
+    """
+    if max_bytes is None:
+        return ds
+
+    if ds.chunks:
+        n_bytes = max_chunk_bytes(ds)
+        if n_bytes > max_bytes:
+            raise MemoryError(
+                f"Chunk terbesar {n_bytes} byte melebihi batas {max_bytes} byte, "
+                "perkecil ukuran chunks"
+            )
+    elif ds.nbytes > max_bytes:
+        raise MemoryError(
+            f"Potongan data {ds.nbytes} byte melebihi batas {max_bytes} byte, "
+            "gunakan mode chunks"
+        )
+    return ds
+
+
+def lazy_dtype_policy(ds):
+    """
+    Kebijakan dtype (engine.dtypes) tanpa memuat data:
+    - chunk : cast dask, tetap lazy
+    - eager : array backend lazy dibiarkan (cast = load penuh);
+              dicast di preprocessor
+    """
+    return apply_dtype_policy(ds) if ds.chunks else ds
+
+
+def record_selected_bytes(ds, file_path):
+    """
+    Catat ukuran file vs ukuran subset terpilih (setelah pushdown)
+    bytes_selected = ukuran data tak terkompresi di memori,
+    bukan I/O disk aktual (kompresi / chunk parsial tidak terhitung)
+    """
+    ds.attrs["bytes_file"] = int(Path(file_path).stat().st_size)
+    ds.attrs["bytes_selected"] = int(ds.nbytes)
+    return ds
+
+
+# ==========================================================
+# 7️⃣ READER MULTI-FILE + INDEX FILE (HIMAWARI PER SLOT)
+# ==========================================================
+INDEX_FILE_NAME = ".file_index.json"
+
+
+def resolve_files(source, pattern="*.nc"):
+    """
+    source: direktori atau pola glob → daftar file terurut
+    """
+    source = str(source)
+    if os.path.isdir(source):
+        source = os.path.join(source, pattern)
+    return sorted(Path(p) for p in glob.glob(source))
+
+
+def scan_file_metadata(file_path):
+    """
+    Baca metadata ringan satu file (tanpa load data):
+    rentang waktu, bbox, dan daftar variabel
+    """
+    file_path = Path(file_path)
+    stat = file_path.stat()
+
+    with xr.open_dataset(file_path) as ds:
+        ds = standardize_coords(ds)
+        entry = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "variables": sorted(ds.data_vars),
+        }
+        if "time" in ds.coords:
+            times = pd.to_datetime(ds["time"].values)
+            entry["time_min"] = times.min().isoformat()
+            entry["time_max"] = times.max().isoformat()
+        for dim in ("lat", "lon"):
+            if dim in ds.coords:
+                entry[f"{dim}_min"] = float(ds[dim].min())
+                entry[f"{dim}_max"] = float(ds[dim].max())
+
+    return entry
+
+
+def build_file_index(source, index_path=None, pattern="*.nc"):
+    """
+    Bangun / perbarui index filename → waktu/bbox/variabel
+    Hanya file baru atau berubah (size/mtime) yang di-scan ulang
+    Index disimpan sebagai JSON di direktori data
+    """
+    files = resolve_files(source, pattern)
+
+    if index_path is None:
+        base = str(source) if os.path.isdir(str(source)) else os.path.dirname(str(source))
+        index_path = Path(base or ".") / INDEX_FILE_NAME
+    index_path = Path(index_path)
+
+    index = {}
+    if index_path.exists():
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+
+    updated = {}
+    changed = False
+    for file_path in files:
+        key = str(file_path.resolve())
+        stat = file_path.stat()
+        entry = index.get(key)
+
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            updated[key] = entry
+        else:
+            updated[key] = scan_file_metadata(file_path)
+            changed = True
+
+    if changed or set(updated) != set(index):
+        tmp_path = index_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(updated, f)
+        os.replace(tmp_path, index_path)
+
+    return updated
+
+
+def select_files(index, time_range=None, region_bbox=None):
+    """
+    Pilih file yang beririsan dengan jendela waktu & bbox
+    """
+    selected = []
+    for key, entry in index.items():
+        if time_range and "time_min" in entry:
+            start, end = time_range
+            if end is not None and pd.Timestamp(entry["time_min"]) > normalize_time(end):
+                continue
+            if start is not None and pd.Timestamp(entry["time_max"]) < normalize_time(start):
+                continue
+
+        if region_bbox and "lat_min" in entry and "lon_min" in entry:
+            lat_min, lat_max, lon_min, lon_max = region_bbox
+            if entry["lat_max"] < lat_min or entry["lat_min"] > lat_max:
+                continue
+            if entry["lon_max"] < lon_min or entry["lon_min"] > lon_max:
+                continue
+
+        selected.append((entry.get("time_min", ""), key))
+
+    return [Path(key) for _, key in sorted(selected)]
+
+
+def _preprocess_mf(ds, region_bbox=None, time_range=None):
+    ds = standardize_coords(ds)
+    return pushdown_subset(ds, region_bbox, time_range)
+
+
+def read_satellite_mf(
+    source,
+    time_range=None,
+    region_bbox=None,
+    chunks="auto",
+    max_bytes=None,
+    index_path=None,
+    pattern="*.nc",
+):
+    """
+    Membaca deret waktu satelit multi-file (satu file per slot)
+    source: direktori atau pola glob
+    Hanya file yang beririsan waktu/bbox yang dibuka (lazy, concat time)
+    """
+    index = build_file_index(source, index_path=index_path, pattern=pattern)
+    files = select_files(index, time_range, region_bbox)
+
+    if not files:
+        raise FileNotFoundError(
+            f"Tidak ada file satelit yang sesuai untuk {source}"
+        )
+
+    ds = xr.open_mfdataset(
+        files,
+        combine="by_coords",
+        chunks=resolve_chunks(chunks) or {},
+        preprocess=partial(
+            _preprocess_mf, region_bbox=region_bbox, time_range=time_range
+        ),
+    )
+
+    if "time" not in ds.coords:
+        raise ValueError("Dataset satelit tidak memiliki koordinat time")
+
+    ds = enforce_memory_limit(ds, max_bytes)
+    ds = lazy_dtype_policy(ds)
+
+    ds.attrs["bytes_file"] = int(sum(index[str(p)]["size"] for p in files))
+    ds.attrs["bytes_selected"] = int(ds.nbytes)
+    ds.attrs["n_files"] = len(files)
+    ds.attrs["reader"] = "BMKG Satellite Multi-file Reader"
+    return ds
+
+
 # ==========================================================
-# 6️⃣ PIPELINE READER TERPADU
+# 8️⃣ PIPELINE READER TERPADU
 # ==========================================================
 def load_event_data(
     sat_file=None,
     nwp_file=None,
     obs_file=None,
     region_bbox=None,
+    time_range=None,
+    chunks=None,
+    max_bytes=None,
 ):
     """
     Pipeline pembaca data kejadian cuaca ekstrem
+    region_bbox & time_range dipotong sebelum data di-load
     """
     data = {}
+    lazy = dict(
+        chunks=chunks,
+        region_bbox=region_bbox,
+        time_range=time_range,
+        max_bytes=max_bytes,
+    )
 
     if sat_file:
-        data["satellite"] = read_satellite_nc(sat_file)
+        data["satellite"] = read_satellite_nc(sat_file, **lazy)
 
     if nwp_file:
-        data["nwp"] = read_nwp_nc(nwp_file)
+        data["nwp"] = read_nwp_nc(nwp_file, **lazy)
 
     if obs_file:
         data["observation"] = read_observation_csv(obs_file)
 
-    # Subset wilayah
-    if region_bbox:
-        lat_min, lat_max, lon_min, lon_max = region_bbox
-        for key, ds in data.items():
-            if isinstance(ds, xr.Dataset):
-                data[key] = subset_by_region(
-                    ds, lat_min, lat_max, lon_min, lon_max
-                )
-
     return data
 
 
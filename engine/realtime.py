@@ -3,11 +3,22 @@
 #  Module : engine/realtime.py
 # ==========================================================
 
+import json
+import os
 import pandas as pd
 import random
 from datetime import datetime
+from pathlib import Path
 from engine.detector import run_detector
 
+# ======================
+# SHARED STORE (HASIL SERVICE INGESTI)
+# ======================
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULT_STORE = BASE_DIR / "data" / "realtime" / "latest.json"
+RESULT_MAX_AGE_MINUTES = 30
+CYCLE_MINUTES = 10
+
 # ======================
 # SAMPLE LOKASI
 # ======================
@@ -22,10 +33,16 @@ WILAYAH_SAMPLE = [
 # ======================
 # LOAD REALTIME DATA
 # ======================
-def load_realtime_data():
+def load_realtime_data(use_store=True):
     """
-    Generate parameter atmosfer → detector → output peta
+    Ambil hasil siklus terakhir dari service ingesti (engine/service.py);
+    bila belum ada / kedaluwarsa: generate parameter atmosfer
+    → detector → output peta
     """
+    if use_store:
+        latest = read_latest_result()
+        if latest is not None:
+            return latest
 
     raw = []
 
@@ -48,3 +65,70 @@ def load_realtime_data():
     detected_df["timestamp"] = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
 
     return detected_df
+
+
+# ======================
+# PUBLISH / BACA HASIL SIKLUS
+# ======================
+def publish_result(detected_df, cycle_time, store_path=RESULT_STORE):
+    """
+    Simpan hasil detector satu siklus ke shared store (tulis atomik)
+    """
+    store_path = Path(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+
+    payload = {
+        "cycle_time": pd.Timestamp(cycle_time).isoformat(),
+        "published_at": datetime.utcnow().isoformat(),
+        "records": json.loads(detected_df.to_json(orient="records")),
+    }
+
+    tmp_path = store_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, store_path)
+
+    return store_path
+
+
+def read_store_payload(store_path=RESULT_STORE, max_age_minutes=RESULT_MAX_AGE_MINUTES):
+    """
+    Payload shared store mentah; None bila tidak ada atau kedaluwarsa
+    """
+    store_path = Path(store_path)
+    if not store_path.exists():
+        return None
+
+    with open(store_path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+
+    published = datetime.fromisoformat(payload["published_at"])
+    age = (datetime.utcnow() - published).total_seconds() / 60
+    if max_age_minutes is not None and age > max_age_minutes:
+        return None
+
+    return payload
+
+
+def read_latest_result(store_path=RESULT_STORE, max_age_minutes=RESULT_MAX_AGE_MINUTES):
+    """
+    Baca hasil siklus terakhir; None bila tidak ada atau kedaluwarsa
+    """
+    payload = read_store_payload(store_path, max_age_minutes)
+    if payload is None:
+        return None
+
+    df = pd.DataFrame(payload["records"])
+    df.attrs["cycle_time"] = payload["cycle_time"]
+    return df
+
+
+def current_cycle_time(store_path=RESULT_STORE):
+    """
+    Waktu siklus analisis aktif (kunci cache dashboard):
+    dari shared store bila segar, selain itu slot 10 menit berjalan
+    """
+    payload = read_store_payload(store_path)
+    if payload is not None:
+        return payload["cycle_time"]
+    return pd.Timestamp.now("UTC").floor(f"{CYCLE_MINUTES}min").strftime("%Y-%m-%dT%H:%M:%S")
@@ -0,0 +1,240 @@
+# ==========================================================
+#  SPATIAL JOIN TITIK/GRID → POLIGON WILAYAH
+#  Module : engine/regions.py
+# ==========================================================
+
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from engine.detector import LEVELS
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+REGION_BOUNDARY = BASE_DIR / "data" / "shp" / "batas_wilayah.geojson"
+
+MASK_CACHE_DIR = BASE_DIR / "data" / "cache" / "masks"
+
+JOIN_CHUNK = 1_000_000                 # titik per batch query STRtree
+MASK_VERSION = 1                       # naikkan bila cara membangun mask berubah
+EARTH_RADIUS_KM = 6371.0
+
+
+# ======================
+# LOAD POLIGON WILAYAH
+# ======================
+@lru_cache(maxsize=8)
+def load_regions(path=REGION_BOUNDARY):
+    """
+    Poligon wilayah dengan region_id = posisi baris (0..n-1)
+    Indeks STRtree dibangun sekali per file
+    """
+    gdf = gpd.read_file(path)
+    if "wilayah" not in gdf.columns:
+        raise ValueError("Batas wilayah harus punya kolom 'wilayah'")
+
+    gdf = gdf[["wilayah", "geometry"]].reset_index(drop=True)
+    gdf.sindex
+    return gdf
+
+
+# ======================
+# TITIK → REGION ID
+# ======================
+def assign_regions(lat, lon, regions, chunk_size=JOIN_CHUNK):
+    """
+    Region ID (posisi poligon) untuk tiap titik lat/lon, -1 bila di luar
+    Titik di batas dua poligon masuk ke region ID terkecil
+    """
+    lat = np.asarray(lat, dtype=float).ravel()
+    lon = np.asarray(lon, dtype=float).ravel()
+    region_id = np.full(lat.shape, -1, dtype=np.int64)
+
+    for start in range(0, lat.size, chunk_size):
+        stop = min(start + chunk_size, lat.size)
+        points = shapely.points(lon[start:stop], lat[start:stop])
+
+        point_idx, poly_idx = regions.sindex.query(points, predicate="intersects")
+        if point_idx.size == 0:
+            continue
+
+        # ambil region ID terkecil per titik
+        order = np.lexsort((poly_idx, point_idx))
+        point_idx, poly_idx = point_idx[order], poly_idx[order]
+        first = np.r_[True, point_idx[1:] != point_idx[:-1]]
+
+        region_id[start + point_idx[first]] = poly_idx[first]
+
+    return region_id
+
+
+def level_codes(levels):
+    """
+    Nama level → kode (0=WASPADA, 1=SIAGA, 2=AWAS, -1 tidak dikenal)
+    """
+    return pd.Categorical(levels, categories=LEVELS).codes.astype(np.int16)
+
+
+# ======================
+# LEVEL MAKSIMUM PER POLIGON
+# ======================
+def max_level_per_region(codes, region_id, n_regions):
+    """
+    Kode level maksimum per region (groupby), -1 bila tanpa deteksi
+    codes & region_id: array sejajar (titik atau sel grid)
+    """
+    codes = np.asarray(codes).ravel()
+    region_id = np.asarray(region_id).ravel()
+    inside = (region_id >= 0) & (codes >= 0)
+
+    result = np.full(n_regions, -1, dtype=np.int16)
+    agg = pd.Series(codes[inside]).groupby(region_id[inside]).max()
+    result[agg.index.to_numpy()] = agg.to_numpy()
+    return result
+
+
+def join_levels_to_regions(detections, regions):
+    """
+    Level tertinggi per poligon dari DataFrame deteksi (lat, lon, level)
+    Output: Series nama level sejajar regions (NaN bila tanpa deteksi)
+    """
+    result = pd.Series(np.nan, index=regions.index, dtype=object)
+    if detections is None or detections.empty:
+        return result
+
+    region_id = assign_regions(detections["lat"], detections["lon"], regions)
+    max_codes = max_level_per_region(
+        level_codes(detections["level"]), region_id, len(regions)
+    )
+
+    has_level = max_codes >= 0
+    result[has_level] = np.asarray(LEVELS, dtype=object)[max_codes[has_level]]
+    return result
+
+
+# ======================
+# MASK RASTER REGION (CACHE PER GRID)
+# ======================
+def grid_hash(lat, lon, boundary_path=REGION_BOUNDARY):
+    """
+    Kunci cache mask: koordinat grid + identitas file batas wilayah
+    """
+    boundary_path = Path(boundary_path)
+    stat = boundary_path.stat()
+
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(lat, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(lon, dtype=np.float64).tobytes())
+    h.update(f"{boundary_path.resolve()}|{stat.st_size}|{stat.st_mtime}|{MASK_VERSION}".encode())
+    return h.hexdigest()
+
+
+def build_region_mask(lat, lon, regions):
+    """
+    Region ID per sel grid (lat, lon), -1 di luar semua poligon
+    """
+    lon2d, lat2d = np.meshgrid(np.asarray(lon), np.asarray(lat))
+    region_id = assign_regions(lat2d, lon2d, regions)
+    return region_id.reshape(lat2d.shape).astype(np.int32)
+
+
+def load_region_mask(lat, lon, boundary_path=REGION_BOUNDARY, cache_dir=MASK_CACHE_DIR):
+    """
+    Mask region untuk grid tsb; dibangun sekali lalu disimpan di disk
+    Output: (mask int32 (lat, lon), array nama wilayah per region ID)
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    path = Path(cache_dir) / f"{grid_hash(lat, lon, boundary_path)}.npz"
+
+    if path.exists():
+        with np.load(path, allow_pickle=False) as cached:
+            return cached["mask"], cached["wilayah"]
+
+    regions = load_regions(boundary_path)
+    mask = build_region_mask(lat, lon, regions)
+    names = regions["wilayah"].to_numpy(dtype=str)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp.npz")
+    np.savez_compressed(tmp_path, mask=mask, wilayah=names)
+    tmp_path.replace(path)
+
+    return mask, names
+
+
+def cell_area_km2(lat, lon):
+    """
+    Luas sel grid lat/lon (km²), bentuk (lat, 1) untuk broadcasting
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    dlat = np.deg2rad(abs(lat[1] - lat[0])) if lat.size > 1 else 0.0
+    dlon = np.deg2rad(abs(lon[1] - lon[0])) if lon.size > 1 else 0.0
+    area = EARTH_RADIUS_KM ** 2 * dlat * dlon * np.cos(np.deg2rad(lat))
+    return area[:, None]
+
+
+# ======================
+# ZONAL STATS (SATU LINTASAN)
+# ======================
+def zonal_stats(field, mask, n_regions, threshold=None, cell_area=None, percentiles=()):
+    """
+    Statistik per region dari satu field 2D dalam satu lintasan
+    (bincount): count, max, mean, dan luas (km²) / jumlah sel >= threshold
+    percentiles: mis. (50, 90) → kolom p50, p90 (interpolasi linear,
+    sama dengan np.percentile) dari satu lexsort (region, nilai)
+    Output: DataFrame diindeks region ID
+    """
+    values = np.asarray(field, dtype=np.float64).ravel()
+    ids = np.asarray(mask).ravel()
+
+    valid = (ids >= 0) & ~np.isnan(values)
+    ids = ids[valid]
+    values = values[valid]
+
+    count = np.bincount(ids, minlength=n_regions)
+    total = np.bincount(ids, weights=values, minlength=n_regions)
+
+    maximum = np.full(n_regions, -np.inf)
+    np.maximum.at(maximum, ids, values)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stats = pd.DataFrame({
+            "count": count,
+            "max": np.where(count > 0, maximum, np.nan),
+            "mean": np.where(count > 0, total / count, np.nan),
+        })
+
+    if threshold is not None:
+        above = values >= threshold
+        if cell_area is None:
+            stats["cells_above"] = np.bincount(ids, weights=above, minlength=n_regions)
+        else:
+            area = np.broadcast_to(cell_area, np.shape(field)).ravel()[valid]
+            stats["area_above_km2"] = np.bincount(
+                ids, weights=area * above, minlength=n_regions
+            )
+
+    if percentiles:
+        sorted_values = values[np.lexsort((values, ids))]
+        starts = np.concatenate([[0], np.cumsum(count)[:-1]])
+        has_data = count > 0
+
+        for q in percentiles:
+            pos = starts + (q / 100.0) * np.maximum(count - 1, 0)
+            lo = np.where(has_data, np.floor(pos), 0).astype(np.int64)
+            hi = np.where(has_data, np.ceil(pos), 0).astype(np.int64)
+            frac = pos - np.floor(pos)
+
+            if sorted_values.size:
+                value = sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * frac
+            else:
+                value = np.full(n_regions, np.nan)
+            stats[f"p{q:g}"] = np.where(has_data, value, np.nan)
+
+    return stats
@@ -0,0 +1,285 @@
+# ==========================================================
+#  SERVICE INGESTI REALTIME (ASYNCIO)
+#  Module : engine/service.py
+#  Jalankan: python -m engine.service
+# ==========================================================
+
+import argparse
+import asyncio
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from engine.reader import DATA_DIR, load_event_data
+from engine.preprocessor import preprocess_all
+from engine.indices import update_indices
+from engine.detector import run_detector
+from engine.regions import REGION_BOUNDARY
+from engine.zonal import zonal_detector_inputs
+from engine.realtime import CYCLE_MINUTES, WILAYAH_SAMPLE, RESULT_STORE, publish_result
+from engine.store import INDEX_STORE, write_indices
+from engine.logger import setup_logger
+from engine.metrics import (
+    METRICS_PORT, cycle, data_nbytes, instrumented, stage, start_metrics_server,
+)
+
+# ======================
+# KONFIGURASI SERVICE
+# ======================
+DROP_DIR = DATA_DIR / "incoming"       # incoming/{satellite,nwp,observation}
+POLL_INTERVAL = 30                     # detik
+SETTLE_SECONDS = 5                     # file dianggap lengkap setelah N detik
+
+INPUT_PATTERNS = {
+    "satellite": "*.nc",
+    "nwp": "*.nc",
+    "observation": "*.csv",
+}
+
+# nama variabel NWP untuk input detector
+NWP_VARS = {
+    "shear": "shear",
+    "cape": "cape",
+}
+
+# RCR antar siklus hanya bila slot sebelumnya tidak lebih tua dari ini
+MAX_SLOT_GAP = pd.Timedelta(minutes=1.5 * CYCLE_MINUTES)
+
+# bbox Jawa Timur (lat_min, lat_max, lon_min, lon_max)
+REGION_BBOX = (-8.8, -6.7, 110.8, 114.7)
+
+logger = setup_logger("puting_beliung.service")
+
+
+# ======================
+# SCAN DROP DIRECTORY
+# ======================
+def latest_inputs(drop_dir=DROP_DIR, settle_seconds=SETTLE_SECONDS):
+    """
+    File terbaru (yang sudah selesai ditulis) per jenis data
+    Output: {jenis: Path | None}
+    """
+    drop_dir = Path(drop_dir)
+    now = time.time()
+    latest = {}
+
+    for kind, pattern in INPUT_PATTERNS.items():
+        files = [
+            p for p in (drop_dir / kind).glob(pattern)
+            if now - p.stat().st_mtime >= settle_seconds
+        ]
+        latest[kind] = max(files, key=lambda p: p.stat().st_mtime) if files else None
+
+    return latest
+
+
+def input_signature(inputs):
+    """
+    Tanda unik kombinasi file input (path + mtime)
+    """
+    return tuple(
+        (kind, str(p), p.stat().st_mtime) if p else (kind, None, None)
+        for kind, p in sorted(inputs.items())
+    )
+
+
+# ======================
+# INPUT DETECTOR PER WILAYAH
+# ======================
+def sample_points(da, locations):
+    """
+    Nilai grid terdekat di tiap lokasi untuk timestep terakhir
+    """
+    if "time" in da.dims:
+        da = da.isel(time=-1)
+
+    return da.sel(
+        lat=xr.DataArray([loc["lat"] for loc in locations], dims="point"),
+        lon=xr.DataArray([loc["lon"] for loc in locations], dims="point"),
+        method="nearest",
+    ).values
+
+
+def build_detector_input(indices_ds, nwp_ds=None, locations=WILAYAH_SAMPLE):
+    """
+    DataFrame wilayah, lat, lon, shear, cape, cb_index dari grid
+    cb_index = CI satelit; shear & cape dari NWP (NaN bila tidak ada)
+    Bila batas wilayah tersedia: zonal stats per kecamatan (slot terakhir),
+    selain itu nilai grid terdekat di lokasi sampel
+    """
+    if Path(REGION_BOUNDARY).exists():
+        return zonal_detector_inputs(indices_ds.isel(time=[-1]), nwp_ds)
+
+    df = pd.DataFrame(locations)
+    df["cb_index"] = sample_points(indices_ds["CI"], locations)
+
+    for col, var in NWP_VARS.items():
+        if nwp_ds is not None and var in nwp_ds:
+            df[col] = sample_points(nwp_ds[var], locations)
+        else:
+            df[col] = np.nan
+
+    return df
+
+
+# ======================
+# INDEKS ANTAR SIKLUS
+# ======================
+@instrumented("calculate_indices")
+def cycle_indices(sat_ds, index_state=None, max_gap=MAX_SLOT_GAP):
+    """
+    Indeks satu siklus lewat update_indices: Himawari datang satu slot
+    per file, sehingga RCR slot pertama memakai BT slot siklus sebelumnya
+    (state). Slot yang sama dihitung ulang (mis. file NWP/observasi
+    baru mengubah input_signature) memakai state sebelum slot tersebut
+    (state["previous"]). State direset bila slot terlewat (> max_gap),
+    slot lebih lama, atau grid berubah; RCR slot pertama lalu NaN
+    Output: (Dataset indeks, state baru)
+    """
+    state = index_state or None
+    first_time = pd.Timestamp(sat_ds["time"].values[0])
+
+    if state and first_time <= pd.Timestamp(state["last_time"]):
+        previous = state.get("previous")
+        if previous is None or first_time > pd.Timestamp(previous["last_time"]):
+            state = previous
+
+    if state:
+        last_time = pd.Timestamp(state["last_time"])
+        if not pd.Timedelta(0) < first_time - last_time <= max_gap:
+            logger.warning(f"Slot {first_time} tidak berurutan dengan {last_time}, state RCR direset")
+            state = None
+
+    try:
+        indices, new_state = update_indices(sat_ds, state)
+    except ValueError as e:
+        logger.warning(f"State RCR direset: {e}")
+        state = None
+        indices, new_state = update_indices(sat_ds, None)
+
+    # state sebelum slot ini, untuk menghitung ulang slot yang sama
+    new_state["previous"] = (
+        {k: v for k, v in state.items() if k != "previous"} if state else None
+    )
+    return indices, new_state
+
+
+# ======================
+# SATU SIKLUS PIPELINE
+# ======================
+def run_cycle(
+    inputs,
+    region_bbox=REGION_BBOX,
+    profile=False,
+    index_store=INDEX_STORE,
+    index_state=None,
+):
+    """
+    reader → preprocessor → indices → detector untuk satu siklus
+    index_state: state cycle_indices dari siklus sebelumnya (RCR)
+    RCR/CI ditambahkan ke store Zarr (engine.store)
+    Metrik tiap tahap dicatat per siklus (engine.metrics);
+    profile=True merekam cProfile siklus terlama
+    Output: (DataFrame hasil detector, waktu siklus, state indeks baru)
+    """
+    sat_file = inputs.get("satellite")
+    with cycle(Path(sat_file).name if sat_file else "-", profile=profile) as record:
+        data = load_event_data(
+            sat_file=sat_file,
+            nwp_file=inputs.get("nwp"),
+            obs_file=inputs.get("observation"),
+            region_bbox=region_bbox,
+        )
+        data = preprocess_all(data)
+
+        indices_ds, index_state = cycle_indices(data["satellite"], index_state)
+        cycle_time = pd.Timestamp(indices_ds["time"].values[-1])
+
+        # arsip RCR/CI; gagal tulis tidak menghentikan deteksi
+        with stage("write_indices", inputs=indices_ds):
+            try:
+                write_indices(indices_ds, index_store)
+            except Exception as e:
+                logger.warning(f"Gagal menulis store indeks: {e}")
+
+        with stage("detector_input", inputs=indices_ds) as rec:
+            detector_input = build_detector_input(indices_ds, data.get("nwp"))
+            rec["output_bytes"] = data_nbytes(detector_input)
+
+        detected = run_detector(detector_input)
+        detected["timestamp"] = cycle_time.strftime("%Y-%m-%d %H:%M UTC")
+        record["cycle_time"] = str(cycle_time)
+
+    return detected, cycle_time, index_state
+
+
+# ======================
+# LOOP SERVICE
+# ======================
+async def run_service(
+    drop_dir=DROP_DIR,
+    poll_interval=POLL_INTERVAL,
+    store_path=RESULT_STORE,
+    once=False,
+    profile=False,
+):
+    """
+    Poll drop directory; jalankan pipeline sekali per input baru
+    dan publish hasil ke shared store (dibaca dashboard)
+    profile: rekam cProfile siklus terlama (lihat engine.metrics)
+    """
+    loop = asyncio.get_running_loop()
+    last_signature = None
+    index_state = None
+
+    while True:
+        inputs = latest_inputs(drop_dir)
+        signature = input_signature(inputs)
+
+        if inputs["satellite"] and signature != last_signature:
+            try:
+                detected, cycle_time, index_state = await loop.run_in_executor(
+                    None, run_cycle, inputs, REGION_BBOX, profile, INDEX_STORE, index_state
+                )
+                publish_result(detected, cycle_time, store_path)
+                last_signature = signature
+                logger.info(f"Siklus {cycle_time} dipublikasikan ({len(detected)} wilayah)")
+            except Exception as e:
+                logger.error(f"Siklus gagal: {e}")
+
+        if once:
+            return last_signature
+
+        await asyncio.sleep(poll_interval)
+
+
+# ======================
+# MAIN
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Service ingesti realtime")
+    parser.add_argument("--drop-dir", default=str(DROP_DIR))
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true")
+    parser.add_argument("--profile", action="store_true",
+                        help="rekam cProfile siklus terlama")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help=f"endpoint /metrics lokal (mis. {METRICS_PORT})")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+        print(f"📈 Metrik: http://127.0.0.1:{args.metrics_port}/metrics")
+
+    print(f"🛰️ Service ingesti: {args.drop_dir} (tiap {args.interval} s)")
+    asyncio.run(
+        run_service(
+            args.drop_dir,
+            poll_interval=args.interval,
+            once=args.once,
+            profile=args.profile,
+        )
+    )
@@ -0,0 +1,117 @@
+# ==========================================================
+#  STORE INDEKS (ZARR) – APPEND PER SIKLUS
+#  Module : engine/store.py
+# ==========================================================
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import xarray as xr
+
+from engine.reader import DATA_DIR, pushdown_subset
+from engine.dtypes import apply_dtype_policy, disk_encoding
+
+# ======================
+# KONFIGURASI STORE
+# ======================
+INDEX_STORE = DATA_DIR / "store" / "indices.zarr"
+INDEX_VARS = ("RCR", "CI")
+STORE_TILE_DEG = 0.5                   # chunk lat/lon ≈ petak 0.5° (region-aligned)
+TIME_ENCODING = {"units": "seconds since 1970-01-01", "dtype": "int64"}
+
+_store_lock = threading.Lock()
+
+
+# ======================
+# CHUNKING SELARAS WILAYAH
+# ======================
+def region_chunks(ds, tile_deg=STORE_TILE_DEG):
+    """
+    Ukuran chunk (time=1, lat/lon ≈ tile_deg derajat)
+    Batas chunk berjangkar di pojok grid (bbox wilayah service),
+    sehingga query bbox kecamatan hanya menyentuh sedikit chunk
+    """
+    chunks = {"time": 1}
+    for dim in ("lat", "lon"):
+        coord = ds[dim].values
+        res = abs(float(coord[1] - coord[0])) if coord.size > 1 else tile_deg
+        chunks[dim] = int(min(coord.size, max(1, round(tile_deg / res))))
+    return chunks
+
+
+# ======================
+# WRITER (APPEND DIMENSI TIME)
+# ======================
+def write_indices(ds, store_path=INDEX_STORE, variables=INDEX_VARS, tile_deg=STORE_TILE_DEG):
+    """
+    Tambahkan field indeks siklus baru ke store Zarr
+    Store baru: encoding int16 berskala (engine.dtypes) + chunk wilayah;
+    store lama: append di dimensi time, slot yang sudah ada dilewati
+    Output: jumlah slot waktu yang ditulis
+    """
+    store_path = Path(store_path)
+    missing = [v for v in variables if v not in ds]
+    if missing:
+        raise ValueError(f"Variabel {missing} tidak ditemukan")
+
+    ds = apply_dtype_policy(ds[list(variables)]).drop_encoding()
+    ds = ds.transpose("time", "lat", "lon")
+
+    with _store_lock:
+        if not store_path.exists():
+            chunks = region_chunks(ds, tile_deg)
+            encoding = disk_encoding(ds, fmt="zarr")
+            for name in ds.data_vars:
+                encoding[name]["chunks"] = tuple(chunks[d] for d in ds[name].dims)
+            encoding["time"] = dict(TIME_ENCODING)
+
+            store_path.parent.mkdir(parents=True, exist_ok=True)
+            ds.chunk(chunks).to_zarr(store_path, mode="w", encoding=encoding)
+            return ds.sizes["time"]
+
+        with xr.open_zarr(store_path) as existing:
+            for dim in ("lat", "lon"):
+                if not np.array_equal(existing[dim].values, ds[dim].values):
+                    raise ValueError(f"Grid {dim} berbeda dengan store {store_path}")
+            stored = existing["time"].values
+            last_time = stored.max() if stored.size else None
+            chunks = {d: existing.chunks[d][0] for d in ("lat", "lon")}
+
+        new = ds.sel(time=~np.isin(ds["time"].values, stored))
+        if new.sizes["time"] == 0:
+            return 0
+        if last_time is not None and new["time"].values.min() <= last_time:
+            raise ValueError(f"Slot baru harus lebih baru dari {last_time}")
+
+        chunks["time"] = 1
+        new.chunk(chunks).to_zarr(store_path, append_dim="time")
+        return new.sizes["time"]
+
+
+# ======================
+# READER (JENDELA WAKTU / BBOX, LAZY)
+# ======================
+def read_indices(
+    store_path=INDEX_STORE,
+    time_range=None,
+    region_bbox=None,
+    variables=None,
+):
+    """
+    Buka store secara lazy lalu potong time_range & region_bbox;
+    hanya chunk yang beririsan jendela yang dibaca saat .load()/.values
+    region_bbox: (lat_min, lat_max, lon_min, lon_max)
+    """
+    store_path = Path(store_path)
+    if not store_path.exists():
+        raise FileNotFoundError(f"Store indeks tidak ditemukan: {store_path}")
+
+    ds = xr.open_zarr(store_path)
+    if variables:
+        ds = ds[list(variables)]
+
+    ds = pushdown_subset(ds, region_bbox, time_range)
+    ds = apply_dtype_policy(ds)
+    ds.attrs["reader"] = "BMKG Index Store Reader"
+    return ds
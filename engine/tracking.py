@@ -0,0 +1,188 @@
+# ==========================================================
+#  TRACKING SEL KONVEKTIF (CONNECTED COMPONENT)
+#  Module : engine/tracking.py
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+from scipy import ndimage
+from scipy.spatial import cKDTree
+
+from engine.indices import convective_indicator
+from engine.regions import cell_area_km2
+
+# ======================
+# PARAMETER SEL
+# ======================
+MIN_CELL_PIXELS = 4                    # sel lebih kecil diabaikan
+MAX_LINK_DISTANCE = 0.2                # derajat, untuk pencocokan centroid
+CONNECTIVITY = np.ones((3, 3), dtype=bool)   # 8-tetangga
+
+CELL_COLUMNS = [
+    "time", "track_id", "label", "area_px", "area_km2",
+    "min_bt", "max_rcr", "lat", "lon", "age",
+]
+
+
+# ======================
+# 1️⃣ LABEL SEL
+# ======================
+def label_cells(mask, min_pixels=MIN_CELL_PIXELS):
+    """
+    Label komponen terhubung dari mask boolean 2D
+    Sel < min_pixels dibuang, label diurutkan ulang 1..n
+    """
+    labels, n = ndimage.label(mask, structure=CONNECTIVITY)
+    if n == 0:
+        return labels, 0
+
+    area = np.bincount(labels.ravel())
+    keep = area >= min_pixels
+    keep[0] = False
+
+    remap = np.zeros(n + 1, dtype=np.int32)
+    remap[keep] = np.arange(1, keep.sum() + 1, dtype=np.int32)
+    return remap[labels], int(keep.sum())
+
+
+# ======================
+# 2️⃣ PROPERTI SEL
+# ======================
+def cell_properties(labels, n, bt, lat, lon, rcr=None):
+    """
+    Luas, BT minimum, RCR maksimum, dan centroid tiap sel
+    """
+    index = np.arange(1, n + 1)
+    if n == 0:
+        return pd.DataFrame(columns=CELL_COLUMNS[2:-1])
+
+    area_px = np.bincount(labels.ravel(), minlength=n + 1)[1:]
+
+    area_km2 = ndimage.sum_labels(
+        np.broadcast_to(cell_area_km2(lat, lon), labels.shape), labels, index
+    )
+
+    min_bt = ndimage.minimum(bt, labels, index)
+    if rcr is None:
+        max_rcr = np.full(n, np.nan)
+    else:
+        max_rcr = ndimage.maximum(np.nan_to_num(rcr, nan=-np.inf), labels, index)
+        max_rcr = np.where(np.isinf(max_rcr), np.nan, max_rcr)
+
+    centroids = np.asarray(ndimage.center_of_mass(labels > 0, labels, index))
+    rows, cols = centroids[:, 0], centroids[:, 1]
+
+    return pd.DataFrame({
+        "label": index,
+        "area_px": area_px,
+        "area_km2": area_km2,
+        "min_bt": min_bt,
+        "max_rcr": max_rcr,
+        "lat": np.interp(rows, np.arange(lat.size), lat),
+        "lon": np.interp(cols, np.arange(lon.size), lon),
+    })
+
+
+# ======================
+# 3️⃣ PENCOCOKAN ANTAR FRAME
+# ======================
+def match_cells(prev_labels, prev_cells, labels, cells, max_distance=MAX_LINK_DISTANCE):
+    """
+    Pasangkan sel frame baru dengan sel frame sebelumnya
+    1. overlap piksel terbesar (greedy, satu-ke-satu)
+    2. sisa sel: centroid terdekat dalam max_distance
+    Output: array label sebelumnya per sel baru (0 = sel baru)
+    """
+    n_cur = len(cells)
+    matched = np.zeros(n_cur, dtype=np.int64)
+    if n_cur == 0 or prev_cells is None or len(prev_cells) == 0:
+        return matched
+
+    # overlap: hitung pasangan (label lama, label baru) sekaligus
+    both = (prev_labels > 0) & (labels > 0)
+    pairs = prev_labels[both].astype(np.int64) * (n_cur + 1) + labels[both]
+    keys, counts = np.unique(pairs, return_counts=True)
+
+    used_prev = set()
+    for i in np.argsort(-counts, kind="stable"):
+        prev_label, cur_label = divmod(int(keys[i]), n_cur + 1)
+        if matched[cur_label - 1] or prev_label in used_prev:
+            continue
+        matched[cur_label - 1] = prev_label
+        used_prev.add(prev_label)
+
+    # centroid terdekat untuk sel tanpa overlap
+    free_prev = prev_cells[~prev_cells["label"].isin(used_prev)]
+    todo = np.flatnonzero(matched == 0)
+    if len(free_prev) and len(todo):
+        tree = cKDTree(free_prev[["lat", "lon"]].to_numpy())
+        dist, idx = tree.query(
+            cells[["lat", "lon"]].to_numpy()[todo],
+            distance_upper_bound=max_distance,
+        )
+        for cur, d, j in sorted(zip(todo, dist, idx), key=lambda x: x[1]):
+            if np.isinf(d):
+                continue
+            prev_label = int(free_prev["label"].iloc[j])
+            if prev_label in used_prev:
+                continue
+            matched[cur] = prev_label
+            used_prev.add(prev_label)
+
+    return matched
+
+
+# ======================
+# 4️⃣ TRACKING INKREMENTAL
+# ======================
+def track_cells(frame, state=None, min_pixels=MIN_CELL_PIXELS, max_distance=MAX_LINK_DISTANCE):
+    """
+    Identifikasi & lacak sel konvektif untuk satu frame baru
+    frame : Dataset satu timestep (BT_IR, opsional RCR)
+    state : dict hasil pemanggilan sebelumnya (None = awal)
+    Output: (DataFrame sel frame ini, state baru)
+    """
+    state = dict(state or {"next_id": 1})
+
+    if "time" in frame.dims:
+        frame = frame.isel(time=-1)
+
+    mask = convective_indicator(frame).get("deep_convection")
+    if mask is None:
+        raise ValueError("BT_IR tidak ditemukan")
+
+    bt = frame["BT_IR"].transpose("lat", "lon").values
+    rcr = frame["RCR"].transpose("lat", "lon").values if "RCR" in frame else None
+    lat = frame["lat"].values
+    lon = frame["lon"].values
+
+    labels, n = label_cells(mask.transpose("lat", "lon").values, min_pixels)
+    cells = cell_properties(labels, n, bt, lat, lon, rcr)
+
+    matched = match_cells(
+        state.get("labels"), state.get("cells"), labels, cells, max_distance
+    )
+
+    prev_tracks = {}
+    prev_cells = state.get("cells")
+    if prev_cells is not None and len(prev_cells):
+        prev_tracks = dict(zip(prev_cells["label"], zip(prev_cells["track_id"], prev_cells["age"])))
+
+    track_id = np.zeros(n, dtype=np.int64)
+    age = np.zeros(n, dtype=np.int64)
+    next_id = state["next_id"]
+    for i, prev_label in enumerate(matched):
+        if prev_label:
+            track_id[i], prev_age = prev_tracks[prev_label]
+            age[i] = prev_age + 1
+        else:
+            track_id[i] = next_id
+            next_id += 1
+
+    cells["track_id"] = track_id
+    cells["age"] = age
+    cells["time"] = frame["time"].values if "time" in frame.coords else None
+    cells = cells[CELL_COLUMNS]
+
+    state.update({"labels": labels, "cells": cells, "next_id": next_id})
+    return cells, state
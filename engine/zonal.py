@@ -0,0 +1,107 @@
+# ==========================================================
+#  ZONAL STATS – GRID → INPUT DETECTOR PER KECAMATAN
+#  Module : engine/zonal.py
+# ==========================================================
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from engine.reader import standardize_coords
+from engine.regions import REGION_BOUNDARY, load_region_mask, load_regions, zonal_stats
+
+# ======================
+# FIELD INPUT DETECTOR
+# ======================
+# kolom detector → (sumber data, nama variabel, statistik)
+ZONAL_FIELDS = {
+    "shear": ("nwp", "shear", "max"),
+    "cape": ("nwp", "cape", "max"),
+    "cb_index": ("satellite", "CI", "max"),
+}
+
+
+# ======================
+# STATISTIK PER REGION (PER TIMESTEP)
+# ======================
+def field_zonal_stats(da, boundary_path=REGION_BOUNDARY, percentiles=(), workers=1):
+    """
+    Statistik per region untuk DataArray (time, lat, lon)
+    lewat engine.regions.zonal_stats (count, max, mean, persentil)
+    Mask region dimuat dari cache; timestep diproses paralel
+    Output: dict {stat: array (time, region)}
+    """
+    da = da.transpose("time", "lat", "lon")
+    mask, names = load_region_mask(da["lat"].values, da["lon"].values, boundary_path)
+    n_regions = len(names)
+
+    def one_step(t):
+        stats = zonal_stats(
+            da.isel(time=t).values, mask, n_regions, percentiles=percentiles
+        )
+        return {key: stats[key].to_numpy() for key in stats.columns}
+
+    steps = range(da.sizes["time"])
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(one_step, steps))
+    else:
+        results = [one_step(t) for t in steps]
+
+    if not results:
+        return {}
+    return {key: np.stack([r[key] for r in results]) for key in results[0]}
+
+
+# ======================
+# STAGE: INDICES → DETECTOR
+# ======================
+def zonal_detector_inputs(
+    indices_ds,
+    nwp_ds=None,
+    boundary_path=REGION_BOUNDARY,
+    fields=ZONAL_FIELDS,
+    percentiles=(),
+    workers=1,
+):
+    """
+    Input detector per kecamatan dari grid satelit (CI) & NWP
+    Output: DataFrame time, wilayah, lat, lon, shear, cape, cb_index
+    (+ kolom <field>_mean / <field>_p<q> sebagai detail)
+    NWP diambil pada waktu terdekat dengan tiap slot satelit
+    """
+    sources = {"satellite": indices_ds, "nwp": nwp_ds}
+    times = pd.to_datetime(indices_ds["time"].values)
+
+    regions = load_regions(boundary_path)
+    points = regions.geometry.representative_point()
+
+    n_regions = len(regions)
+    base = pd.DataFrame({
+        "time": np.repeat(times, n_regions),
+        "wilayah": np.tile(regions["wilayah"].to_numpy(), len(times)),
+        "lat": np.tile(points.y.to_numpy(), len(times)),
+        "lon": np.tile(points.x.to_numpy(), len(times)),
+    })
+    has_data = np.zeros(len(base), dtype=bool)
+
+    for col, (source, var, stat) in fields.items():
+        ds = sources.get(source)
+        if ds is None or var not in ds:
+            base[col] = np.nan
+            continue
+
+        da = standardize_coords(ds)[var]
+        if source != "satellite":
+            da = da.sel(time=indices_ds["time"], method="nearest")
+
+        stats = field_zonal_stats(da, boundary_path, percentiles, workers)
+
+        base[col] = stats[stat].ravel()
+        base[f"{col}_mean"] = stats["mean"].ravel()
+        for q in percentiles:
+            base[f"{col}_p{q:g}"] = stats[f"p{q:g}"].ravel()
+        has_data |= stats["count"].ravel() > 0
+
+    return base[has_data].reset_index(drop=True)
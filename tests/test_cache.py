@@ -0,0 +1,56 @@
+# ==========================================================
+#  TEST CACHE HASIL & DATASET
+#  Jalankan: python -m pytest tests/test_cache.py
+# ==========================================================
+
+import numpy as np
+import xarray as xr
+
+from engine.cache import DatasetCache, ResultCache
+
+
+def small_dataset():
+    return xr.Dataset({"a": ("x", np.arange(3.0))})
+
+
+def test_dataset_cache_counts_one_miss_per_compute(tmp_path):
+    cache = DatasetCache(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return small_dataset()
+
+    cache.get_or_compute("k1", compute)
+    cache.get_or_compute("k2", compute)
+    cached = cache.get_or_compute("k1", compute)
+
+    assert len(calls) == 2
+    assert cache.stats == {"hits": 1, "misses": 2, "evictions": 0}
+    xr.testing.assert_identical(cached, small_dataset())
+
+
+def test_result_cache_disk_tier_bounded(tmp_path):
+    cache = ResultCache(maxsize=2, disk_dir=tmp_path, disk_maxsize=3)
+    for i in range(10):
+        cache.set(("k", i), i)
+    cache.set("expired", 0, ttl=-1)
+
+    assert len(list(tmp_path.glob("*.pkl"))) == 3
+    assert cache.get(("k", 9)) == 9
+
+    cache.clear()
+    assert not list(tmp_path.glob("*.pkl"))
+    assert cache.get(("k", 9)) is None
+
+
+def test_result_cache_stale_pickle_is_a_miss(tmp_path):
+    cache = ResultCache(disk_dir=tmp_path)
+    cache.set("stale", 1)
+    path = cache._disk_path("stale")
+    # pickle yang merujuk modul yang sudah tidak ada
+    path.write_bytes(b"\x80\x04\x8c\x0bnomodule_xx\x94\x8c\x03Foo\x94\x93\x94.")
+
+    fresh = ResultCache(disk_dir=tmp_path)
+    assert fresh.get("stale", "default") == "default"
+    assert not path.exists()
@@ -0,0 +1,67 @@
+# ==========================================================
+#  TEST SWEEP AMBANG vs DETECTOR VEKTOR
+#  Jalankan: python -m pytest tests/test_calibration.py
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine import detector
+from engine.detector import LEVELS
+from engine.calibration import (
+    SWEEP_VARS,
+    default_candidates,
+    sweep_thresholds,
+    to_thresholds,
+)
+
+
+@pytest.fixture(scope="module")
+def history():
+    rng = np.random.default_rng(0)
+    n = 5000
+    df = pd.DataFrame({
+        "shear": rng.uniform(0, 25, n),
+        "cape": rng.uniform(0, 3000, n),
+        "cb_index": rng.choice(np.round(np.arange(0, 1.01, 0.2), 1), n),
+    })
+    df.loc[rng.random(n) < 0.05, "cape"] = np.nan
+    df["event"] = rng.random(n) < (df["shear"] / 50 + df["cb_index"] / 4)
+    return df
+
+
+@pytest.fixture
+def restore_thresholds():
+    original = {var: dict(levels) for var, levels in detector.THRESHOLDS.items()}
+    yield
+    detector.THRESHOLDS.clear()
+    detector.THRESHOLDS.update(original)
+
+
+@pytest.mark.parametrize("warn_level", LEVELS)
+def test_sweep_matches_detector(history, restore_thresholds, warn_level):
+    result = sweep_thresholds(history, warn_level=warn_level)
+    events = history["event"].to_numpy()
+    rng = np.random.default_rng(1)
+
+    for row_id in rng.choice(len(result), 20, replace=False):
+        row = result.iloc[row_id]
+        detector.THRESHOLDS.update(to_thresholds(row))
+        score = sum(detector.score_variable(history[v], v) for v in SWEEP_VARS)
+        warn = detector.level_codes_from_score(score) >= LEVELS.index(warn_level)
+
+        assert row["hits"] == (warn & events).sum()
+        assert row["false_alarms"] == (warn & ~events).sum()
+        assert row["hits"] + row["misses"] == events.sum()
+        assert row["false_alarms"] + row["correct_negatives"] == (~events).sum()
+
+
+def test_workers_identical(history):
+    candidates = {var: default_candidates()[var][::2] for var in SWEEP_VARS}
+    serial = sweep_thresholds(history, candidates, block_cells=1 << 14)
+    # blok kecil (~4 blok untuk data ini) → dibagi ke proses
+    parallel = sweep_thresholds(history, candidates, workers=2, block_cells=1 << 14)
+
+    assert len(serial) > 1
+    pd.testing.assert_frame_equal(serial, parallel)
@@ -0,0 +1,135 @@
+# ==========================================================
+#  TEST PARITAS DETECTOR – SKALAR vs VEKTOR vs GRID
+#  Jalankan: python -m pytest tests/test_detector.py
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from engine.detector import (
+    LEVELS,
+    THRESHOLDS,
+    classify_level,
+    level_names,
+    run_detector,
+    run_detector_grid,
+)
+
+STEP = {"shear": 0.1, "cape": 1, "cb_index": 0.01}
+
+
+def make_sample(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "wilayah": [f"W{i}" for i in range(n)],
+        "lat": rng.uniform(-8.5, -7.0, n),
+        "lon": rng.uniform(112.0, 113.5, n),
+        "shear": np.round(rng.uniform(0, 25, n), 1),
+        "cape": rng.integers(0, 3500, n).astype(float),
+        "cb_index": np.round(rng.uniform(0, 1, n), 2),
+    })
+
+
+def edge_sample():
+    """
+    Tiap variabel tepat di ambang & satu langkah di bawahnya,
+    dikombinasikan dengan semua ambang variabel lain
+    """
+    values = {
+        var: [v for lvl in LEVELS for v in (THRESHOLDS[var][lvl], THRESHOLDS[var][lvl] - STEP[var])]
+        for var in THRESHOLDS
+    }
+    grid = np.meshgrid(*values.values(), indexing="ij")
+    df = pd.DataFrame({var: g.ravel() for var, g in zip(values, grid)})
+    df.insert(0, "wilayah", [f"E{i}" for i in range(len(df))])
+    df.insert(1, "lat", -7.5)
+    df.insert(2, "lon", 112.7)
+    return df
+
+
+def assert_parity(sample):
+    scalar = run_detector(sample, vectorized=False)
+    batch = run_detector(sample)
+
+    assert list(scalar.columns) == list(batch.columns)
+    assert (scalar["level"].to_numpy() == batch["level"].to_numpy()).all()
+    assert (scalar["keterangan"].to_numpy() == batch["keterangan"].to_numpy()).all()
+    return scalar
+
+
+def test_random_values_parity():
+    assert_parity(make_sample())
+
+
+def test_threshold_edges_parity():
+    scalar = assert_parity(edge_sample())
+    # semua level muncul di kombinasi ambang
+    assert set(scalar["level"]) == set(LEVELS)
+
+
+@pytest.mark.parametrize("var", list(THRESHOLDS))
+def test_exact_threshold_edges(var):
+    # variabel lain di ambang SIAGA (skor 2 + 2):
+    # tepat di ambang AWAS → 7 (AWAS), satu langkah di bawah → 6 (SIAGA)
+    others = {v: THRESHOLDS[v]["SIAGA"] for v in THRESHOLDS if v != var}
+    assert classify_level(**others, **{var: THRESHOLDS[var]["AWAS"]}) == "AWAS"
+    assert classify_level(**others, **{var: THRESHOLDS[var]["AWAS"] - STEP[var]}) == "SIAGA"
+
+    # variabel lain di bawah WASPADA: tepat di ambang WASPADA → skor 1
+    low = {v: 0 for v in THRESHOLDS if v != var}
+    assert classify_level(**low, **{var: THRESHOLDS[var]["WASPADA"]}) == "WASPADA"
+
+
+@pytest.mark.parametrize("var", list(THRESHOLDS))
+def test_nan_parity(var):
+    sample = make_sample(200, seed=1)
+    sample.loc[::3, var] = np.nan
+    scalar = assert_parity(sample)
+
+    # NaN tidak menambah skor
+    nan_rows = sample[var].isna().to_numpy()
+    filled = sample.copy()
+    filled.loc[nan_rows, var] = -np.inf
+    assert (run_detector(filled)["level"].to_numpy()[nan_rows]
+            == scalar["level"].to_numpy()[nan_rows]).all()
+
+
+def test_empty_frame():
+    sample = make_sample(10)
+    assert run_detector(sample.iloc[:0]).empty
+    assert run_detector(sample.iloc[:0], vectorized=False).empty
+    assert run_detector(None).empty
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_grid_vs_scalar(dtype):
+    sample = pd.concat([make_sample(2000, seed=2), edge_sample()], ignore_index=True)
+    sample.loc[::97, "shear"] = np.nan
+
+    grid = xr.Dataset({
+        var: (("cell",), sample[var].to_numpy().astype(dtype)) for var in THRESHOLDS
+    })
+    codes = run_detector_grid(grid)
+    assert codes.dtype == np.uint8
+
+    expected = [
+        classify_level(*(float(grid[var].values[i]) for var in THRESHOLDS))
+        for i in range(len(sample))
+    ]
+    assert (level_names(codes.values) == np.asarray(expected, dtype=object)).all()
+
+
+def test_grid_var_map():
+    sample = make_sample(100, seed=3)
+    grid = xr.Dataset({
+        "shear": (("cell",), sample["shear"].to_numpy()),
+        "cape": (("cell",), sample["cape"].to_numpy()),
+        "CI": (("cell",), sample["cb_index"].to_numpy()),
+    })
+    codes = run_detector_grid(grid, var_map={"cb_index": "CI"})
+    assert (level_names(codes.values) == run_detector(sample)["level"].to_numpy()).all()
+
+    with pytest.raises(ValueError):
+        run_detector_grid(grid)
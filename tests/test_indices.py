@@ -0,0 +1,72 @@
+# ==========================================================
+#  TEST INDEKS INKREMENTAL vs BATCH
+#  Jalankan: python -m pytest tests/test_indices.py
+# ==========================================================
+
+import numpy as np
+import pytest
+
+from engine.reader import read_sample_data
+from engine.indices import calculate_indices, update_indices
+
+
+def bt_series(n_time=8, n_lat=7, n_lon=9, seed=0):
+    ds = read_sample_data(n_lat, n_lon, n_time, seed=seed).drop_vars("RCR")
+    bt = ds["BT_IR"].values
+    bt[np.random.default_rng(seed).random(bt.shape) < 0.1] = np.nan
+    return ds
+
+
+def assert_bitwise(a, b):
+    assert a.dtype == b.dtype
+    assert np.array_equal(a.values, b.values, equal_nan=True)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_slot_by_slot_matches_batch(seed):
+    ds = bt_series(seed=seed)
+    batch = calculate_indices(ds)
+
+    state = None
+    for i in range(ds.sizes["time"]):
+        out, state = update_indices(ds.isel(time=[i]), state)
+        for var in ("RCR", "CI"):
+            assert_bitwise(out[var], batch[var].isel(time=[i]))
+
+
+def test_multi_slot_frames_match_batch():
+    ds = bt_series(n_time=9)
+    batch = calculate_indices(ds)
+
+    state, parts = None, []
+    for t0 in range(0, 9, 4):
+        out, state = update_indices(ds.isel(time=slice(t0, t0 + 4)), state)
+        parts.append(out)
+
+    for var in ("RCR", "CI"):
+        got = np.concatenate([p[var].values for p in parts])
+        assert np.array_equal(got, batch[var].values, equal_nan=True)
+
+
+def test_existing_rcr_is_kept():
+    ds = read_sample_data(5, 5, 3, seed=1)
+    batch = calculate_indices(ds)
+    out, _ = update_indices(ds.isel(time=[1]), None)
+    assert_bitwise(out["RCR"], batch["RCR"].isel(time=[1]))
+    assert_bitwise(out["CI"], batch["CI"].isel(time=[1]))
+
+
+@pytest.mark.parametrize("order", [(2, 1), (2, 2)])
+def test_out_of_order_slot_raises(order):
+    ds = bt_series(n_time=4)
+    _, state = update_indices(ds.isel(time=[order[0]]), None)
+    with pytest.raises(ValueError):
+        update_indices(ds.isel(time=[order[1]]), state)
+
+
+def test_grid_change_raises():
+    ds = bt_series(n_time=2)
+    _, state = update_indices(ds.isel(time=[0]), None)
+    smaller = ds.isel(time=[1], lat=slice(0, -1))
+    with pytest.raises(ValueError):
+        update_indices(smaller, state)
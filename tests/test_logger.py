@@ -0,0 +1,49 @@
+# ==========================================================
+#  TEST LOG REALTIME (PARQUET TERPARTISI)
+#  Jalankan: python -m pytest tests/test_logger.py
+# ==========================================================
+
+import pandas as pd
+import pytest
+
+from engine import logger
+
+
+@pytest.fixture
+def realtime_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger, "REALTIME_DIR", tmp_path / "realtime")
+    return tmp_path / "realtime"
+
+
+def decisions():
+    return pd.DataFrame({
+        "wilayah": ["Gresik", "Gresik", "Sidoarjo", "Lamongan"],
+        "level": ["AWAS", "SIAGA", "AWAS", "WASPADA"],
+        "shear": [18.0, 12.5, 20.1, 6.0],
+        "cape": [2500, 1500, 2800, 400],
+        "cb_index": [0.9, 0.6, 0.95, 0.2],
+    })
+
+
+def test_filter_by_wilayah_and_level(realtime_dir):
+    logger.log_realtime(decisions(), "Jawa Timur", flush=True)
+
+    df = logger.read_realtime_log(wilayah="Gresik", level="AWAS")
+    assert df["wilayah"].tolist() == ["Gresik"]
+    assert df["level"].tolist() == ["AWAS"]
+    assert df["region"].tolist() == ["Jawa Timur"]
+
+    both = logger.read_realtime_log(wilayah=["Gresik", "Sidoarjo"], level="AWAS")
+    assert sorted(both["wilayah"]) == ["Gresik", "Sidoarjo"]
+
+    assert logger.read_realtime_log(region="Gresik").empty
+
+
+def test_mixed_cape_dtypes_read_back(realtime_dir):
+    ints = decisions()
+    floats = decisions().assign(cape=lambda d: d["cape"] + 0.5)
+    logger.log_realtime(ints, "Jawa Timur", flush=True)
+    logger.log_realtime(floats, "Jawa Timur", flush=True)
+
+    df = logger.read_realtime_log(wilayah="Lamongan")
+    assert sorted(df["cape"]) == [400.0, 400.5]
@@ -0,0 +1,97 @@
+# ==========================================================
+#  TEST PARITAS PREPROCESSING STREAMING vs BATCH
+#  Jalankan: python -m pytest tests/test_preprocessor.py
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from engine.preprocessor import (
+    preprocess_nwp,
+    preprocess_satellite,
+    preprocess_streaming,
+)
+
+
+def make_series(n_time=30, n_lat=6, n_lon=7, seed=0, nan_frac=0.4):
+    """
+    Deret satelit dengan pola tepi:
+    NaN acak, piksel all-NaN, piksel satu titik valid,
+    piksel dua titik valid, nilai di luar QC_RANGES
+    """
+    rng = np.random.default_rng(seed)
+    shape = (n_time, n_lat, n_lon)
+    bt = 290 - 60 * rng.random(shape)
+    rcr = 4 * rng.random(shape) - 10
+
+    bt[rng.random(shape) < nan_frac] = np.nan
+    rcr[rng.random(shape) < nan_frac] = np.nan
+
+    # ditolak QC (BT 180-330 K, RCR -20..5)
+    bt[rng.random(shape) < 0.05] = 100.0
+    bt[rng.random(shape) < 0.05] = 400.0
+    rcr[rng.random(shape) < 0.05] = 12.0
+
+    bt[:, 0, 0] = np.nan                              # all-NaN
+    rcr[:, 0, 1] = np.nan
+    bt[:, 1, 0] = np.nan                              # satu titik valid
+    bt[rng.integers(n_time), 1, 0] = 250.0
+    bt[:, 1, 1] = np.nan                              # hanya valid setelah QC: satu
+    bt[3, 1, 1], bt[9, 1, 1] = 250.0, 400.0
+    bt[:, 2, 0] = np.nan                              # dua titik valid berjauhan
+    bt[[1, n_time - 2], 2, 0] = (240.0, 260.0)
+    bt[:-1, 2, 1] = np.nan                            # hanya slot terakhir
+    bt[-1, 2, 1] = 255.0
+
+    return xr.Dataset(
+        {
+            "BT_IR": (("time", "lat", "lon"), bt),
+            "RCR": (("time", "lat", "lon"), rcr),
+        },
+        coords={
+            "time": pd.date_range("2026-01-01", periods=n_time, freq="10min"),
+            "lat": np.linspace(-8.5, -7.0, n_lat),
+            "lon": np.linspace(112.0, 113.5, n_lon),
+        },
+    )
+
+
+def assert_same(stream, batch):
+    assert list(stream.data_vars) == list(batch.data_vars)
+    for var in batch.data_vars:
+        assert stream[var].dtype == batch[var].dtype
+        assert np.array_equal(stream[var].values, batch[var].values, equal_nan=True), var
+
+
+@pytest.mark.parametrize("seed", range(2))
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 4, 5])
+def test_streaming_matches_batch(seed, chunk_size):
+    ds = make_series(seed=seed)
+    batch = preprocess_satellite(ds.copy(deep=True))
+    stream = preprocess_streaming(ds.copy(deep=True), chunk_size=chunk_size)
+    assert_same(stream, batch)
+
+
+@pytest.mark.parametrize("nan_frac", [0.0, 0.8, 0.95])
+def test_streaming_sparse_and_dense(nan_frac):
+    ds = make_series(seed=7, nan_frac=nan_frac)
+    batch = preprocess_satellite(ds.copy(deep=True))
+    stream = preprocess_streaming(ds.copy(deep=True), chunk_size=4)
+    assert_same(stream, batch)
+
+
+def test_streaming_nwp_matches_batch():
+    ds = make_series(seed=3).rename({"BT_IR": "rh", "RCR": "u"})
+    ds["rh"] = ds["rh"] - 200                         # sebagian di luar 0-100 %
+    batch = preprocess_nwp(ds.copy(deep=True))
+    stream = preprocess_streaming(ds.copy(deep=True), kind="nwp", chunk_size=3)
+    assert_same(stream, batch)
+
+
+def test_sink_receives_all_slots():
+    ds = make_series(n_time=11)
+    chunks = []
+    assert preprocess_streaming(ds, chunk_size=4, sink=chunks.append) is None
+    assert [c.sizes["time"] for c in chunks] == [4, 4, 3]
@@ -0,0 +1,45 @@
+# ==========================================================
+#  TEST OVERLAY PNG – KUNCI CACHE PER SIKLUS & GRID
+#  Jalankan: python -m pytest tests/test_raster.py
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from visualization.raster import render_overlay_png
+
+
+def level_grid(lat0=-8.5, n_lat=3, time="2026-01-01 00:10"):
+    return xr.DataArray(
+        np.ones((1, n_lat, 4), dtype=np.uint8),
+        dims=("time", "lat", "lon"),
+        coords={
+            "time": pd.DatetimeIndex([time]),
+            "lat": lat0 + 0.1 * np.arange(n_lat),
+            "lon": 112.0 + 0.1 * np.arange(4),
+        },
+    )
+
+
+def test_same_cycle_and_grid_reuses_png(tmp_path):
+    p1, b1 = render_overlay_png(level_grid(), cache_dir=tmp_path)
+    p2, b2 = render_overlay_png(level_grid(), cache_dir=tmp_path)
+    assert p1 == p2 and b1 == b2
+
+
+@pytest.mark.parametrize("other", [level_grid(lat0=-7.0), level_grid(n_lat=5)])
+def test_other_grid_same_cycle_gets_own_png(tmp_path, other):
+    p1, _ = render_overlay_png(level_grid(), cache_dir=tmp_path)
+    p2, _ = render_overlay_png(other, cache_dir=tmp_path)
+    assert p1 != p2 and p1.exists() and p2.exists()
+
+
+def test_cycle_key_from_time_or_required(tmp_path):
+    p1, _ = render_overlay_png(level_grid(), cache_dir=tmp_path)
+    p2, _ = render_overlay_png(level_grid(time="2026-01-01 00:20"), cache_dir=tmp_path)
+    assert p1 != p2
+
+    with pytest.raises(ValueError):
+        render_overlay_png(level_grid().isel(time=0, drop=True), cache_dir=tmp_path)
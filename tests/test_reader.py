@@ -0,0 +1,44 @@
+# ==========================================================
+#  TEST READER – PUSHDOWN SUBSET
+#  Jalankan: python -m pytest tests/test_reader.py
+# ==========================================================
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from engine.reader import pushdown_subset, read_nwp_nc
+
+BBOX = (-8.0, -7.5, 112.5, 113.0)
+
+
+def era5_file(path):
+    lat = np.arange(-6.0, -9.01, -0.1)             # menurun, 31 titik
+    lon = np.arange(111.0, 116.01, 0.1)            # 51 titik
+    time = pd.date_range("2026-01-01", periods=2, freq="1h")
+    rng = np.random.default_rng(0)
+    ds = xr.Dataset(
+        {"r": (("time", "latitude", "longitude"), rng.random((2, lat.size, lon.size)))},
+        coords={"time": time, "latitude": lat, "longitude": lon},
+    )
+    ds.to_netcdf(path)
+    return path
+
+
+@pytest.mark.parametrize("chunks", [None, "auto"])
+def test_nwp_era5_bbox_is_subset(tmp_path, chunks):
+    path = era5_file(tmp_path / "era5.nc")
+    ds = read_nwp_nc(path, chunks=chunks, region_bbox=BBOX)
+
+    assert "lat" in ds.dims and "lon" in ds.dims
+    assert ds["lat"].min() >= BBOX[0] - 1e-9 and ds["lat"].max() <= BBOX[1] + 1e-9
+    assert ds["lon"].min() >= BBOX[2] - 1e-9 and ds["lon"].max() <= BBOX[3] + 1e-9
+    assert ds.sizes["lat"] < 31 and ds.sizes["lon"] < 51
+    assert ds.attrs["bytes_selected"] < 2 * 31 * 51 * 8      # bukan seluruh domain
+
+
+def test_bbox_without_lat_lon_raises():
+    ds = xr.Dataset({"x": (("y", "x_"), np.zeros((3, 3)))})
+    with pytest.raises(ValueError):
+        pushdown_subset(ds, region_bbox=BBOX)
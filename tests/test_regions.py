@@ -0,0 +1,41 @@
+# ==========================================================
+#  TEST ZONAL STATS (BINCOUNT + PERSENTIL)
+#  Jalankan: python -m pytest tests/test_regions.py
+# ==========================================================
+
+import numpy as np
+import pytest
+
+from engine.regions import zonal_stats
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_zonal_stats_matches_numpy(seed):
+    rng = np.random.default_rng(seed)
+    n_regions = 6
+    field = rng.random((15, 20)) * 30
+    field[rng.random(field.shape) < 0.3] = np.nan
+    mask = rng.integers(-1, n_regions, field.shape)
+    mask[mask == 2] = -1                              # region tanpa sel
+    field[mask == 4] = np.nan                         # region tanpa data valid
+
+    stats = zonal_stats(field, mask, n_regions, threshold=15, percentiles=(10, 50, 90))
+
+    for r in range(n_regions):
+        v = field[(mask == r) & ~np.isnan(field)]
+        assert stats.loc[r, "count"] == v.size
+        assert stats.loc[r, "cells_above"] == (v >= 15).sum()
+        if v.size == 0:
+            assert stats.loc[r, ["max", "mean", "p10", "p50", "p90"]].isna().all()
+            continue
+        assert stats.loc[r, "max"] == v.max()
+        assert np.isclose(stats.loc[r, "mean"], v.mean())
+        for q in (10, 50, 90):
+            assert np.isclose(stats.loc[r, f"p{q}"], np.percentile(v, q))
+
+
+def test_zonal_stats_all_nan():
+    field = np.full((3, 3), np.nan)
+    stats = zonal_stats(field, np.zeros((3, 3), dtype=int), 2, percentiles=(50,))
+    assert (stats["count"] == 0).all()
+    assert stats["p50"].isna().all()
@@ -0,0 +1,53 @@
+# ==========================================================
+#  TEST STATE RCR ANTAR SIKLUS SERVICE
+#  Jalankan: python -m pytest tests/test_service.py
+# ==========================================================
+
+import numpy as np
+
+from engine.reader import read_sample_data
+from engine.indices import calculate_indices
+from engine.service import cycle_indices
+
+
+def slots(n_time=4, seed=0):
+    ds = read_sample_data(8, 9, n_time, seed=seed).drop_vars("RCR")
+    return ds, [ds.isel(time=[i]) for i in range(n_time)]
+
+
+def test_consecutive_slots_match_batch():
+    ds, frames = slots()
+    batch = calculate_indices(ds)
+
+    state = None
+    for i, frame in enumerate(frames):
+        out, state = cycle_indices(frame, state)
+        if i == 0:
+            assert np.isnan(out["RCR"].values).all()
+        else:
+            np.testing.assert_array_equal(
+                out["RCR"].values, batch["RCR"].isel(time=[i]).values
+            )
+
+
+def test_same_slot_recomputed_keeps_rcr():
+    _, frames = slots()
+    _, state = cycle_indices(frames[0], None)
+    first, state = cycle_indices(frames[1], state)
+
+    # slot sama dijalankan ulang (input NWP/observasi berubah)
+    again, state = cycle_indices(frames[1], state)
+    assert not np.isnan(again["RCR"].values).any()
+    np.testing.assert_array_equal(again["RCR"].values, first["RCR"].values)
+    np.testing.assert_array_equal(again["CI"].values, first["CI"].values)
+
+    # siklus berikutnya tetap berantai dari slot yang dihitung ulang
+    nxt, _ = cycle_indices(frames[2], state)
+    assert not np.isnan(nxt["RCR"].values).any()
+
+
+def test_gap_resets_state():
+    _, frames = slots(n_time=4)
+    _, state = cycle_indices(frames[0], None)
+    out, _ = cycle_indices(frames[3], state)
+    assert np.isnan(out["RCR"].values).all()
@@ -0,0 +1,104 @@
+# ==========================================================
+#  GEOMETRI BATAS WILAYAH – LOD & INDEKS SPASIAL
+#  Module : visualization/geometry.py
+#  Preprocessing offline: python -m visualization.geometry
+# ==========================================================
+
+from functools import lru_cache
+from pathlib import Path
+
+import geopandas as gpd
+from shapely.geometry import box
+
+# ======================
+# PATH & TOLERANSI PER ZOOM
+# ======================
+BOUNDARY_SRC = Path("data/shp/batas_wilayah.geojson")
+LOD_DIR = Path("data/shp/lod")
+
+# zoom folium → toleransi simplifikasi (derajat)
+LOD_TOLERANCE = {
+    6: 0.02,
+    8: 0.005,
+    10: 0.001,
+    12: 0.0002,
+}
+
+
+# ======================
+# BUILD LOD (OFFLINE)
+# ======================
+def lod_path(zoom, lod_dir=LOD_DIR):
+    return Path(lod_dir) / f"batas_wilayah_z{zoom}.parquet"
+
+
+def build_boundary_lods(src=BOUNDARY_SRC, lod_dir=LOD_DIR, tolerances=LOD_TOLERANCE):
+    """
+    Simplifikasi geometri per level zoom → GeoParquet
+    Output: dict {zoom: path}
+    """
+    gdf = gpd.read_file(src)
+    if "wilayah" not in gdf.columns:
+        raise ValueError("GeoJSON batas wilayah harus punya kolom 'wilayah'")
+
+    gdf = gdf[["wilayah", "geometry"]]
+    Path(lod_dir).mkdir(parents=True, exist_ok=True)
+
+    paths = {}
+    for zoom, tolerance in sorted(tolerances.items()):
+        lod = gdf.copy()
+        lod["geometry"] = lod.geometry.simplify(tolerance, preserve_topology=True)
+        lod = lod[~lod.geometry.is_empty]
+
+        paths[zoom] = lod_path(zoom, lod_dir)
+        lod.to_parquet(paths[zoom])
+
+    return paths
+
+
+# ======================
+# LOAD LOD + STRTREE
+# ======================
+def lod_for_zoom(zoom, tolerances=LOD_TOLERANCE):
+    """
+    Level LOD terdekat yang tidak lebih detail dari zoom peta
+    """
+    levels = sorted(tolerances)
+    eligible = [z for z in levels if z <= zoom]
+    return eligible[-1] if eligible else levels[0]
+
+
+def lod_available(lod_dir=LOD_DIR, tolerances=LOD_TOLERANCE):
+    return all(lod_path(z, lod_dir).exists() for z in tolerances)
+
+
+@lru_cache(maxsize=None)
+def load_boundary_lod(zoom, lod_dir=LOD_DIR):
+    """
+    GeoDataFrame LOD untuk zoom tsb, indeks STRtree dibangun sekali
+    """
+    gdf = gpd.read_parquet(lod_path(lod_for_zoom(zoom), lod_dir))
+    gdf.sindex  # bangun STRtree sekarang, bukan saat query pertama
+    return gdf
+
+
+def query_viewport(bounds=None, zoom=8, lod_dir=LOD_DIR):
+    """
+    Fitur yang beririsan viewport pada level detail sesuai zoom
+    bounds: (lon_min, lat_min, lon_max, lat_max); None = semua fitur
+    """
+    gdf = load_boundary_lod(lod_for_zoom(zoom), lod_dir)
+    if bounds is None:
+        return gdf
+
+    idx = gdf.sindex.query(box(*bounds), predicate="intersects")
+    return gdf.iloc[sorted(idx)]
+
+
+# ======================
+# MAIN (PREPROCESSING OFFLINE)
+# ======================
+if __name__ == "__main__":
+    print("🗺️ Build LOD batas wilayah")
+    for zoom, path in build_boundary_lods().items():
+        print(f"  z{zoom}: {path} ({path.stat().st_size / 1e6:.2f} MB)")
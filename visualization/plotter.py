@@ -3,11 +3,18 @@
 #  Module : visualization/plotter.py
 # ==========================================================
 
+import json
+import math
+
 import folium
 import geopandas as gpd
 import streamlit as st
 from streamlit_folium import st_folium
 
+from engine.regions import join_levels_to_regions
+from visualization.geometry import lod_available, query_viewport
+from visualization.raster import render_overlay_png
+
 # ======================
 # COLOR MAP LEVEL
 # ======================
@@ -17,6 +24,9 @@ LEVEL_COLOR = {
     "AWAS": "#E57373"      # merah
 }
 
+DEFAULT_CENTER = [-7.5, 112.5]
+DEFAULT_ZOOM = 8
+
 # ======================
 # LOAD BATAS WILAYAH
 # ======================
@@ -39,25 +49,122 @@ def aggregate_level(realtime_df):
         return {}
 
     priority = {"WASPADA": 1, "SIAGA": 2, "AWAS": 3}
+    levels = {v: k for k, v in priority.items()}
 
-    agg = {}
-    for _, row in realtime_df.iterrows():
-        w = row["wilayah"]
-        lvl = row["level"]
+    agg = realtime_df["level"].map(priority).groupby(realtime_df["wilayah"]).max()
+    return agg.map(levels).to_dict()
 
-        if w not in agg or priority[lvl] > priority[agg[w]]:
-            agg[w] = lvl
+# ======================
+# GEOJSON SIAP RENDER (UNTUK CACHE)
+# ======================
+def build_map_geojson(realtime_df, bounds=None, zoom=DEFAULT_ZOOM):
+    """
+    GeoJSON batas wilayah + properti 'level' tertinggi per wilayah
+    Hasilnya bisa di-cache dan dipakai ulang oleh render_realtime_map
+    Bila LOD tersedia (python -m visualization.geometry), hanya fitur
+    di viewport (bounds) dengan detail sesuai zoom yang dikirim
+    """
+    if lod_available():
+        gdf = query_viewport(bounds, zoom)[["wilayah", "geometry"]].copy()
+    else:
+        gdf = load_boundary()[["wilayah", "geometry"]].copy()
+    gdf = gdf.reset_index(drop=True)
 
-    return agg
+    # deteksi ber-lat/lon (titik atau sel grid) → spatial join,
+    # selain itu cocokkan nama wilayah
+    if realtime_df is not None and {"lat", "lon"} <= set(realtime_df.columns):
+        gdf["level"] = join_levels_to_regions(realtime_df, gdf)
+    else:
+        gdf["level"] = gdf["wilayah"].map(aggregate_level(realtime_df))
+
+    return json.loads(gdf.to_json())
 
 # ======================
 # RENDER MAP
 # ======================
-def render_realtime_map(realtime_df, height=600):
+def viewport_from_state(map_state):
+    """
+    Ambil (bounds, zoom) dari nilai kembali st_folium
+    bounds: (lon_min, lat_min, lon_max, lat_max)
+    """
+    if not map_state or not map_state.get("bounds"):
+        return None, DEFAULT_ZOOM
+
+    sw = map_state["bounds"].get("_southWest") or {}
+    ne = map_state["bounds"].get("_northEast") or {}
+    if None in (sw.get("lng"), sw.get("lat"), ne.get("lng"), ne.get("lat")):
+        return None, DEFAULT_ZOOM
+
+    bounds = (sw["lng"], sw["lat"], ne["lng"], ne["lat"])
+    return bounds, map_state.get("zoom") or DEFAULT_ZOOM
+
+
+def quantize_viewport(bounds, zoom=DEFAULT_ZOOM, steps_per_tile=4):
+    """
+    Bulatkan viewport ke grid kasar agar bisa dipakai sebagai kunci cache
+    zoom dibulatkan ke integer; bounds dilebarkan keluar ke kelipatan
+    (360 / 2**zoom) / steps_per_tile derajat (lebar tile / steps_per_tile),
+    sehingga tetap mencakup
+    viewport asli dan pergeseran kecil peta jatuh ke kunci yang sama
+    """
+    zoom = int(round(zoom or DEFAULT_ZOOM))
+    if bounds is None:
+        return None, zoom
+
+    step = 360 / 2 ** zoom / steps_per_tile
+    lon_min, lat_min, lon_max, lat_max = bounds
+    quantized = (
+        math.floor(lon_min / step) * step,
+        math.floor(lat_min / step) * step,
+        math.ceil(lon_max / step) * step,
+        math.ceil(lat_max / step) * step,
+    )
+    return tuple(round(v, 6) for v in quantized), zoom
+
+
+def add_grid_overlay(m, grid, cycle_key=None, kind="level", opacity=0.6):
+    """
+    Tambah grid CI / level sebagai satu image overlay PNG
+    (pengganti ribuan CircleMarker untuk output per sel)
+    cycle_key: None → dari koordinat time grid (lihat grid_cycle_key)
+    """
+    path, overlay_bounds = render_overlay_png(grid, cycle_key, kind)
+
+    folium.raster_layers.ImageOverlay(
+        image=str(path),
+        bounds=overlay_bounds,
+        opacity=opacity,
+        name="Grid CI" if kind == "ci" else "Grid Level",
+    ).add_to(m)
+
+
+def render_realtime_map(
+    realtime_df,
+    height=600,
+    internal=False,
+    geojson=None,
+    bounds=None,
+    zoom=DEFAULT_ZOOM,
+    grid=None,
+    cycle_key=None,
+    grid_kind="level",
+):
+    """
+    internal: tampilkan detail teknis (keterangan) di popup titik
+    geojson : hasil build_map_geojson (dari cache); None = bangun ulang
+    bounds, zoom: viewport terakhir (lihat viewport_from_state)
+    grid, cycle_key, grid_kind: grid level (uint8) / CI per sel
+        dirender sebagai overlay PNG per siklus; cycle_key None →
+        diturunkan dari koordinat time grid
+    Output: state peta dari st_folium
+    """
+    location = DEFAULT_CENTER
+    if bounds is not None:
+        location = [(bounds[1] + bounds[3]) / 2, (bounds[0] + bounds[2]) / 2]
 
     m = folium.Map(
-        location=[-7.5, 112.5],
-        zoom_start=8,
+        location=location,
+        zoom_start=zoom,
         tiles="CartoDB positron"
     )
 
@@ -65,12 +172,11 @@ def render_realtime_map(realtime_df, height=600):
     # POLYGON RISIKO
     # ------------------
     try:
-        gdf = load_boundary()
-        level_map = aggregate_level(realtime_df)
+        if geojson is None:
+            geojson = build_map_geojson(realtime_df, bounds, zoom)
 
         def style_func(feature):
-            wilayah = feature["properties"].get("wilayah")
-            level = level_map.get(wilayah)
+            level = feature["properties"].get("level")
 
             return {
                 "fillColor": LEVEL_COLOR.get(level, "transparent"),
@@ -80,7 +186,7 @@ def render_realtime_map(realtime_df, height=600):
             }
 
         folium.GeoJson(
-            gdf,
+            geojson,
             name="Risiko Puting Beliung",
             style_function=style_func,
             tooltip=folium.GeoJsonTooltip(
@@ -92,6 +198,15 @@ def render_realtime_map(realtime_df, height=600):
     except Exception as e:
         st.warning(f"Gagal memuat polygon wilayah: {e}")
 
+    # ------------------
+    # OVERLAY GRID (PER SEL)
+    # ------------------
+    if grid is not None:
+        try:
+            add_grid_overlay(m, grid, cycle_key, grid_kind)
+        except Exception as e:
+            st.warning(f"Gagal membuat overlay grid: {e}")
+
     # ------------------
     # TITIK DETAIL
     # ------------------
@@ -102,8 +217,9 @@ def render_realtime_map(realtime_df, height=600):
             popup = f"""
             <b>Wilayah</b>: {row['wilayah']}<br>
             <b>Level</b>: {row['level']}<br>
-            <b>Detail</b>: {row['keterangan']}
             """
+            if internal:
+                popup += f"<b>Detail</b>: {row['keterangan']}"
 
             folium.CircleMarker(
                 location=[row["lat"], row["lon"]],
@@ -116,4 +232,4 @@ def render_realtime_map(realtime_df, height=600):
 
     folium.LayerControl().add_to(m)
 
-    st_folium(m, width=1200, height=height)
+    return st_folium(m, width=1200, height=height)
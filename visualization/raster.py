@@ -0,0 +1,165 @@
+# ==========================================================
+#  RASTER OVERLAY – GRID CI / LEVEL → PNG
+#  Module : visualization/raster.py
+# ==========================================================
+
+import hashlib
+import re
+from pathlib import Path
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.colors import to_rgba
+from matplotlib.image import imsave
+
+# ======================
+# PATH & PALET
+# ======================
+OVERLAY_CACHE_DIR = Path("data/cache/overlays")
+OVERLAY_KEEP = 24                      # jumlah siklus yang disimpan per jenis
+OVERLAY_MAX_SIZE = 2048                # piksel maksimum per sisi
+
+# kode level 0 (WASPADA) = tanpa sinyal signifikan → transparan
+LEVEL_PALETTE = ["#00000000", "#FFB74D", "#E57373"]
+CI_COLORMAP = "YlOrRd"
+
+
+# ======================
+# GRID → RGBA
+# ======================
+def _north_up(da):
+    """
+    Urutkan grid (lat, lon) agar baris pertama = utara
+    """
+    if "time" in da.dims:
+        da = da.isel(time=-1)
+    da = da.transpose("lat", "lon")
+    if da["lat"][0] < da["lat"][-1]:
+        da = da.isel(lat=slice(None, None, -1))
+    if da["lon"][0] > da["lon"][-1]:
+        da = da.isel(lon=slice(None, None, -1))
+    return da
+
+
+def _limit_size(da, max_size=OVERLAY_MAX_SIZE):
+    """
+    Perkecil grid besar dengan nilai maksimum per blok
+    (sel berisiko tidak hilang saat downsampling)
+    """
+    factor = int(np.ceil(max(da.sizes["lat"], da.sizes["lon"]) / max_size))
+    if factor <= 1:
+        return da
+    return da.coarsen(lat=factor, lon=factor, boundary="trim").max()
+
+
+def grid_to_rgba(da, kind="level"):
+    """
+    Warna RGBA uint8 (lat, lon, 4) untuk grid level (uint8) atau CI (0-1)
+    """
+    values = np.asarray(da.values)
+
+    if kind == "level":
+        palette = np.array(
+            [[int(c * 255) for c in to_rgba(color)] for color in LEVEL_PALETTE],
+            dtype=np.uint8,
+        )
+        codes = np.clip(np.nan_to_num(values, nan=0), 0, len(palette) - 1)
+        return palette[codes.astype(np.intp)]
+
+    if kind == "ci":
+        rgba = colormaps[CI_COLORMAP](np.nan_to_num(values, nan=0.0), bytes=True)
+        rgba[..., 3] = np.where(np.nan_to_num(values, nan=0.0) > 0, 255, 0)
+        return rgba
+
+    raise ValueError(f"Jenis overlay {kind} tidak dikenal")
+
+
+def grid_bounds(da):
+    """
+    Batas overlay folium [[lat_min, lon_min], [lat_max, lon_max]]
+    (tepi sel, bukan pusat sel)
+    """
+    lat = np.asarray(da["lat"].values, dtype=float)
+    lon = np.asarray(da["lon"].values, dtype=float)
+    dlat = abs(lat[1] - lat[0]) / 2 if lat.size > 1 else 0
+    dlon = abs(lon[1] - lon[0]) / 2 if lon.size > 1 else 0
+    return [
+        [float(lat.min() - dlat), float(lon.min() - dlon)],
+        [float(lat.max() + dlat), float(lon.max() + dlon)],
+    ]
+
+
+# ======================
+# PNG PER SIKLUS (CACHE)
+# ======================
+def grid_cycle_key(da, cycle_key=None):
+    """
+    Kunci siklus overlay: cycle_key bila diberikan,
+    selain itu dari koordinat time grid (slot terakhir)
+    """
+    if cycle_key is not None:
+        return cycle_key
+    if "time" not in da.coords:
+        raise ValueError("cycle_key wajib diisi bila grid tanpa koordinat time")
+
+    times = np.asarray(da["time"].values).ravel()
+    if times.dtype.kind == "M":
+        return str(np.datetime64(times.max(), "m"))
+    return str(times.max())
+
+
+def grid_signature(da):
+    """
+    Hash pendek koordinat lat/lon (+ bentuk) grid: domain / bbox berbeda
+    pada siklus yang sama → PNG berbeda
+    """
+    digest = hashlib.sha1()
+    for dim in ("lat", "lon"):
+        coord = np.ascontiguousarray(da[dim].values, dtype=np.float64)
+        digest.update(f"{dim}:{coord.size};".encode())
+        digest.update(coord.tobytes())
+    return digest.hexdigest()[:12]
+
+
+def overlay_path(cycle_key, kind="level", cache_dir=OVERLAY_CACHE_DIR, grid_key=None):
+    safe_key = re.sub(r"[^0-9A-Za-z_-]", "", str(cycle_key))
+    suffix = f"_{grid_key}" if grid_key else ""
+    return Path(cache_dir) / f"{kind}_{safe_key}{suffix}.png"
+
+
+def render_overlay_png(da, cycle_key=None, kind="level", cache_dir=OVERLAY_CACHE_DIR):
+    """
+    Rasterisasi grid menjadi PNG berwarna untuk satu siklus
+    PNG dibuat ulang bila (siklus, grid) baru (file belum ada);
+    grid dikenali dari hash lat/lon (grid_signature)
+    cycle_key: None → diturunkan dari koordinat time grid
+    Output: (path PNG, bounds)
+    """
+    cycle_key = grid_cycle_key(da, cycle_key)
+    da = _north_up(da)
+    bounds = grid_bounds(da)
+    path = overlay_path(cycle_key, kind, cache_dir, grid_signature(da))
+
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        rgba = grid_to_rgba(_limit_size(da), kind)
+
+        tmp_path = path.with_name(path.stem + ".tmp.png")
+        imsave(tmp_path, rgba)
+        tmp_path.replace(path)
+
+        prune_overlays(kind, cache_dir)
+
+    return path, bounds
+
+
+def prune_overlays(kind="level", cache_dir=OVERLAY_CACHE_DIR, keep=OVERLAY_KEEP):
+    """
+    Hapus PNG siklus lama, sisakan `keep` terbaru
+    """
+    files = sorted(
+        Path(cache_dir).glob(f"{kind}_*.png"),
+        key=lambda p: p.stat().st_mtime,
+    )
+    for old in files[:-keep]:
+        old.unlink(missing_ok=True)